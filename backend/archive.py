@@ -0,0 +1,213 @@
+"""
+Cold storage for closed years of expenses.
+
+Once a year is over its rows are moved out of the MySQL `expenses` table into
+one zstd-compressed Parquet file per year (archive/expenses_2023.parquet, …).
+The files are opened memory-mapped and only the years that overlap a request
+are ever touched, so the hot table stays small while multi-year reports keep
+working.  db_helper merges these results with the hot table transparently.
+"""
+
+import importlib.util
+import os
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+from backend.lazy_import import deferred
+from backend.loggin_setup import setup_logger
+
+
+logger = setup_logger("archive")
+
+ARCHIVE_DIR = os.environ.get(
+    "EXPENSE_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "archive"),
+)
+
+# archival is optional, the hot table works without pyarrow; and since pyarrow
+# is the slowest import in the backend it is loaded when a cold file is first
+# touched rather than at startup
+HAVE_PYARROW = importlib.util.find_spec("pyarrow") is not None
+pa = pc = pq = SCHEMA = None
+
+# a cold file is rewritten read-modify-write, and partitioning.archive_year moves
+# rows into one in several steps: everything that writes a closed year holds this
+write_lock = threading.RLock()
+
+
+def _import_pyarrow():
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.parquet
+
+    schema = pyarrow.schema([
+        ("id", pyarrow.int64()),
+        ("expense_date", pyarrow.date32()),
+        ("amount", pyarrow.decimal128(10, 2)),
+        ("category", pyarrow.string()),
+        ("notes", pyarrow.string()),
+    ])
+    return {"pa": pyarrow, "pc": pyarrow.compute, "pq": pyarrow.parquet, "SCHEMA": schema}
+
+
+_load_pyarrow = deferred(globals(), _import_pyarrow)
+
+
+def to_date(value):
+    """Accept a date, datetime or 'YYYY-MM-DD' string and return a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def archive_path(year):
+    return os.path.join(ARCHIVE_DIR, f"expenses_{year}.parquet")
+
+
+def archived_years():
+    """Sorted list of years that have a cold file."""
+    if not HAVE_PYARROW or not os.path.isdir(ARCHIVE_DIR):
+        return []
+
+    years = []
+    for name in os.listdir(ARCHIVE_DIR):
+        if name.startswith("expenses_") and name.endswith(".parquet"):
+            year = name[len("expenses_"):-len(".parquet")]
+            if year.isdigit():
+                years.append(int(year))
+    return sorted(years)
+
+
+def is_archived(year):
+    return year in archived_years()
+
+
+def _years_between(start_date, end_date):
+    start_date, end_date = to_date(start_date), to_date(end_date)
+    return [y for y in archived_years() if start_date.year <= y <= end_date.year]
+
+
+def _read_year(year, columns=None, filters=None):
+    _load_pyarrow()
+    return pq.read_table(archive_path(year), columns=columns, filters=filters, memory_map=True)
+
+
+def _read_range(start_date, end_date, columns):
+    """Concatenate the rows of every archived year inside the range."""
+    start_date, end_date = to_date(start_date), to_date(end_date)
+    filters = [("expense_date", ">=", start_date), ("expense_date", "<=", end_date)]
+    tables = [_read_year(y, columns, filters) for y in _years_between(start_date, end_date)]
+    if not tables:
+        return None
+    return pa.concat_tables(tables)
+
+
+def write_year(year, rows):
+    """
+    Write (or rewrite) the cold file for `year`.
+
+    `rows` are dicts shaped like the `expenses` table.  Rows already in the
+    file are kept, so a year can be archived again after late inserts.
+    Returns the number of rows in the resulting file.
+    """
+    if not HAVE_PYARROW:
+        raise RuntimeError("pyarrow is required to archive expenses")
+    _load_pyarrow()
+
+    table = pa.Table.from_pylist(
+        [{**row, "amount": Decimal(str(row["amount"]))} for row in rows],
+        schema=SCHEMA,
+    )
+    with write_lock:
+        if is_archived(year):
+            table = pa.concat_tables([_read_year(year), table])
+
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        path = archive_path(year)
+        tmp_path = path + ".tmp"
+        pq.write_table(table.sort_by("expense_date"), tmp_path, compression="zstd")
+        os.replace(tmp_path, path)  # readers never see a half written file
+
+    logger.info(f"write_year archived {table.num_rows} rows for {year}")
+    return table.num_rows
+
+
+def delete_date(expense_date):
+    """Remove one day's rows from its cold file (used when a day is re-entered)."""
+    expense_date = to_date(expense_date)
+    with write_lock:
+        if not is_archived(expense_date.year):
+            return
+
+        table = _read_year(expense_date.year)
+        keep = pc.not_equal(table["expense_date"], pa.scalar(expense_date, pa.date32()))
+        path = archive_path(expense_date.year)
+        tmp_path = path + ".tmp"
+        pq.write_table(table.filter(keep), tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+
+def expenses_for_date(expense_date):
+    expense_date = to_date(expense_date)
+    if not is_archived(expense_date.year):
+        return []
+
+    table = _read_year(expense_date.year, filters=[("expense_date", "=", expense_date)])
+    return table.to_pylist()
+
+
+def expenses_between(start_date, end_date):
+    table = _read_range(start_date, end_date, None)
+    return table.to_pylist() if table is not None else []
+
+
+def watermark():
+    """(row count, highest id) over every cold file."""
+    count, max_id = 0, 0
+    for year in archived_years():
+        ids = _read_year(year, columns=["id"])["id"]
+        count += len(ids)
+        if len(ids):
+            max_id = max(max_id, pc.max(ids).as_py())
+    return count, max_id
+
+
+def summary_by_category(start_date, end_date):
+    """Same shape as db_helper.fetch_expense_summary: [{'category', 'total'}, …]."""
+    table = _read_range(start_date, end_date, ["category", "amount"])
+    if table is None or table.num_rows == 0:
+        return []
+
+    grouped = table.group_by("category").aggregate([("amount", "sum")])
+    return [{"category": row["category"], "total": row["amount_sum"]}
+            for row in grouped.to_pylist()]
+
+
+def rollup(start_date, end_date, granularity, group_by_category=True):
+    """Sparse [{'period', 'category', 'total'}, …] like db_helper.fetch_rollup."""
+    table = _read_range(start_date, end_date, ["expense_date", "category", "amount"])
+    if table is None or table.num_rows == 0:
+        return []
+
+    periods = pc.floor_temporal(table["expense_date"], unit=granularity, week_starts_monday=True)
+    keys = ["period", "category"] if group_by_category else ["period"]
+    grouped = pa.table({"period": periods, "category": table["category"], "amount": table["amount"]}) \
+        .group_by(keys).aggregate([("amount", "sum")])
+    return [{"period": row["period"], "category": row.get("category", "Total"), "total": row["amount_sum"]}
+            for row in grouped.to_pylist()]
+
+
+def summary_by_month():
+    """Totals per calendar month number over every archived year: {8: Decimal(…), …}."""
+    totals = {}
+    for year in archived_years():
+        table = _read_year(year, columns=["expense_date", "amount"])
+        months = pc.month(table["expense_date"])
+        grouped = pa.table({"month": months, "amount": table["amount"]}) \
+            .group_by("month").aggregate([("amount", "sum")])
+        for row in grouped.to_pylist():
+            totals[row["month"]] = totals.get(row["month"], 0) + row["amount_sum"]
+    return totals
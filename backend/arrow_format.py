@@ -0,0 +1,96 @@
+"""
+Apache Arrow IPC responses.
+
+Clients that send `Accept: application/vnd.apache.arrow.stream` get analytics
+and range reads as an Arrow IPC stream instead of JSON.  Each cursor batch
+becomes one record batch and is written to the response as soon as it is
+built, and the client can load the stream into a DataFrame without parsing
+JSON.
+"""
+
+import importlib.util
+import io
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from backend.lazy_import import deferred
+
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# without pyarrow every client simply gets JSON; with it, pyarrow is still only
+# imported by the first request that asks for Arrow, to keep startup fast
+HAVE_PYARROW = importlib.util.find_spec("pyarrow") is not None
+pa = None
+
+
+def _import_pyarrow():
+    import pyarrow
+
+    expense_schema = pyarrow.schema([
+        ("id", pyarrow.int64()),
+        ("expense_date", pyarrow.date32()),
+        ("amount", pyarrow.float64()),
+        ("category", pyarrow.string()),
+        ("notes", pyarrow.string()),
+    ])
+    summary_schema = pyarrow.schema([
+        ("category", pyarrow.string()),
+        ("total", pyarrow.float64()),
+        ("percentage", pyarrow.float64()),
+    ])
+    monthly_schema = pyarrow.schema([
+        ("month_name", pyarrow.string()),
+        ("total", pyarrow.float64()),
+    ])
+    return {"pa": pyarrow, "EXPENSE_SCHEMA": expense_schema, "SUMMARY_SCHEMA": summary_schema,
+            "MONTHLY_SCHEMA": monthly_schema}
+
+
+_load_pyarrow = deferred(globals(), _import_pyarrow)
+
+
+def __getattr__(name):
+    """EXPENSE_SCHEMA, SUMMARY_SCHEMA and MONTHLY_SCHEMA are built on first access."""
+    if name.endswith("_SCHEMA") and HAVE_PYARROW:
+        _load_pyarrow()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def rollup_schema(categories):
+    """One `period` column plus a float column per category (wide rollup matrix)."""
+    _load_pyarrow()
+    return pa.schema([("period", pa.date32())] + [(c, pa.float64()) for c in categories])
+
+
+def wants_arrow(request: Request):
+    if not HAVE_PYARROW or ARROW_STREAM not in request.headers.get("accept", ""):
+        return False
+    _load_pyarrow()
+    return True
+
+
+def record_batch(rows, schema):
+    """Column-wise conversion, so DECIMAL values are cast in one vectorized step."""
+    arrays = [pa.array([row.get(field.name) for row in rows]).cast(field.type) for field in schema]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _stream(batches, schema):
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for rows in batches:
+            if not rows:
+                continue
+            writer.write_batch(record_batch(rows, schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()  # end-of-stream marker
+
+
+def arrow_response(batches, schema):
+    """Stream an iterable of row batches (lists of dicts) as Arrow IPC."""
+    return StreamingResponse(_stream(batches, schema), media_type=ARROW_STREAM)
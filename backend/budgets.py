@@ -0,0 +1,116 @@
+"""
+Per-category budgets and threshold alerts, checked as expenses are written.
+
+A budget caps one category's spend per week, month or year and lists the
+fractions of that cap worth an alert (80% and 100% by default).  After a write
+commits, the change in spend per category is applied to running totals for
+the periods that contain the written date, and each budget on a changed
+category compares its period's total before and after: crossing a threshold
+upwards raises an alert.  The cost is one dictionary update per period and one
+comparison per budget on the touched categories, however long the history.
+
+A running total is seeded from the database the first time a (category,
+period) is needed and kept current from then on, including from writes made
+by other workers (see `observe`).  With several workers a seed remembers the
+snapshot generation it read, so replaying a change the database already held
+at seeding time does not count it twice.
+"""
+
+import json
+import threading
+from datetime import datetime
+
+from backend.rollup import period_end, period_start
+
+
+PERIODS = ("week", "month", "year")
+DEFAULT_THRESHOLDS = (0.8, 1.0)
+
+
+def budget_from_row(row):
+    """A `budgets` table row with its thresholds decoded and amounts as floats."""
+    return {"id": row["id"], "category": row["category"], "period": row["period"],
+            "amount": float(row["amount"]), "thresholds": json.loads(row["thresholds"])}
+
+
+class BudgetMonitor:
+    """Running per-(category, period) totals and the threshold checks on top of them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}  # (category, period, period start) -> total spend
+        self._seeded_at = {}  # same keys -> snapshot generation the seed read
+
+    def clear(self):
+        with self._lock:
+            self._totals.clear()
+            self._seeded_at.clear()
+
+    def observe(self, expense_date, deltas, generation=None):
+        """
+        Apply a write made elsewhere to the totals already held; nothing is
+        seeded or checked.  A write at or before a total's seed generation is
+        already part of it and is skipped.
+        """
+        with self._lock:
+            for category, delta in deltas.items():
+                for period in PERIODS:
+                    key = (category, period, period_start(expense_date, period))
+                    if key not in self._totals:
+                        continue
+                    if generation is not None and generation <= self._seeded_at.get(key, -1):
+                        continue
+                    self._totals[key] += delta
+
+    def evaluate(self, expense_date, deltas, budgets, load_total, generation=None):
+        """
+        Apply `deltas` ({category: change in spend}) for a committed write on
+        `expense_date` and return the alerts it raised.
+
+        `budgets` are the budgets on the changed categories, and
+        `load_total(category, first_day, last_day)` reads a period's total from
+        the database (already including this write) when it is not held yet.
+        `generation` is the shared snapshot's generation after this write, if
+        there is one.
+        """
+        by_category = {}
+        for budget in budgets:
+            by_category.setdefault(budget["category"], []).append(budget)
+
+        alerts = []
+        created_at = datetime.now().replace(microsecond=0)
+        with self._lock:
+            for category, delta in deltas.items():
+                before, after = {}, {}
+                for period in PERIODS:
+                    key = (category, period, period_start(expense_date, period))
+                    if key in self._totals:
+                        before[period] = self._totals[key]
+                        after[period] = self._totals[key] = before[period] + delta
+                    elif any(b["period"] == period for b in by_category.get(category, ())):
+                        total = load_total(category, key[2], period_end(expense_date, period))
+                        after[period] = self._totals[key] = float(total)
+                        if generation is not None:
+                            self._seeded_at[key] = generation
+                        before[period] = after[period] - delta
+
+                for budget in by_category.get(category, ()):
+                    old, new = before[budget["period"]], after[budget["period"]]
+                    for threshold in budget["thresholds"]:
+                        limit = round(budget["amount"] * threshold, 2)
+                        if round(old, 2) < limit <= round(new, 2):
+                            alerts.append({
+                                "budget_id": budget["id"],
+                                "category": category,
+                                "period": budget["period"],
+                                "period_start": period_start(expense_date, budget["period"]),
+                                "threshold": threshold,
+                                "budget_amount": budget["amount"],
+                                "total": round(new, 2),
+                                "expense_date": expense_date,
+                                "created_at": created_at,
+                            })
+        return alerts
+
+
+budget_monitor = BudgetMonitor()
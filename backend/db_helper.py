@@ -1,33 +1,53 @@
-import mysql.connector
-from contextlib import contextmanager
+import calendar
+import threading
+from datetime import date
+from contextlib import ExitStack, contextmanager
+from backend import archive, slow_query, storage, tracing
+from backend.search_index import search_index
+from backend.stats import expense_stats
 from backend.loggin_setup import setup_logger
 
 
 logger = setup_logger("db_helper")
 
-@contextmanager
-def get_db_cursor(commit=False):
-    connection = mysql.connector.connect(
-        host="localhost",
-        user="YOURUSER",
-        password="YOURPASSWORD",
-        database="expense_manager",
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The storage engine, created on first use so importing db_helper connects to nothing."""
+    global engine
+    if "engine" not in globals():
+        with _engine_lock:
+            if "engine" not in globals():
+                engine = storage.create_engine()
+    return engine
 
-    )
 
-    # if connection.is_connected():
-    #     print("Connection successful")
-    # else:
-    #     print("Failed to connect to a database")
+def __getattr__(name):
+    # `db_helper.engine` before anything has used it
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    cursor = connection.cursor(dictionary=True)
-    yield cursor
 
-    if commit:
-        connection.commit()
+def use_engine(new_engine):
+    """Swap the storage engine, e.g. for an in-memory database in tests and benchmarks."""
+    global engine
+    engine = new_engine
+    return engine
 
-    cursor.close()
-    connection.close()
+
+@contextmanager
+def get_db_cursor(commit=False):
+    current = get_engine()
+    with ExitStack() as stack:
+        with tracing.span("db.connect", **{"db.system": current.name}):
+            cursor = slow_query.TracedCursor(stack.enter_context(current.cursor(commit=commit)))
+        yield cursor
+        cursor.close_query()
+    # the engine cursor is released, so EXPLAIN can take its own
+    if cursor.slow:
+        slow_query.explain_and_log(current, cursor.slow)
 
 def fetch_all_records():
     with get_db_cursor() as cursor:
@@ -38,65 +58,252 @@ def fetch_all_records():
             print(expense)
 
 
+@tracing.traced()
 def fetch_expenses_for_date(expense_date):
     logger.info(f"fetch_expenses_for_date called with {expense_date}")
     with get_db_cursor() as cursor:
         cursor.execute("SELECT * FROM expenses WHERE expense_date = %s", (expense_date,))
         expenses = cursor.fetchall()
-        return expenses
+    return expenses + archive.expenses_for_date(expense_date)
 
 
+@tracing.traced()
 def insert_expense(expense_date, amount, category, notes):
     logger.info(f"insert_expenses called with {expense_date}")
     with get_db_cursor(commit=True) as cursor:
         cursor.execute("INSERT INTO expenses (expense_date, amount, category, notes) VALUES (%s, %s, %s, %s)",
                        (expense_date, amount, category, notes)
                        )
+        expense_id = cursor.lastrowid
+    expense_stats.record(expense_date, category, amount)
+    search_index.add({"id": expense_id, "expense_date": expense_date, "amount": amount,
+                      "category": category, "notes": notes})
+    return expense_id
 
 
+@tracing.traced()
 def delete_expense_for_date(expense_date):
     logger.info(f"delete_expenses_for_date called with {expense_date}")
     with get_db_cursor(commit=True) as cursor:
+        cursor.execute("SELECT id, category, amount FROM expenses WHERE expense_date = %s", (expense_date,))
+        deleted = cursor.fetchall()
         cursor.execute("DELETE FROM expenses WHERE expense_date = %s", (expense_date,))
+    with archive.write_lock:
+        cold = archive.expenses_for_date(expense_date)
+        if cold:  # rewriting a year's file is only worth it when the day is in it
+            archive.delete_date(expense_date)
+    deleted += cold
+
+    for row in deleted:
+        expense_stats.remove(expense_date, row["category"], row["amount"])
+        search_index.remove(row["id"])
+    return deleted
+
+
+@tracing.traced()
+def iter_expense_batches(start_date=None, end_date=None, batch_size=10000):
+    """
+    Yield expenses as lists of at most `batch_size` rows, hot table first then
+    the cold archive, optionally restricted to a date range.
+    """
+    logger.info(f"iter_expense_batches called with start: {start_date}, end: {end_date}")
+    with get_db_cursor() as cursor:
+        if start_date is None:
+            cursor.execute("SELECT * FROM expenses")
+        else:
+            cursor.execute("SELECT * FROM expenses WHERE expense_date BETWEEN %s AND %s ORDER BY expense_date",
+                           (start_date, end_date))
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+
+    first = archive.to_date(start_date) if start_date is not None else date.min
+    last = archive.to_date(end_date) if end_date is not None else date.max
+    for year in archive.archived_years():
+        if not first.year <= year <= last.year:
+            continue
+        rows = archive.expenses_between(max(first, date(year, 1, 1)), min(last, date(year, 12, 31)))
+        for i in range(0, len(rows), batch_size):
+            yield rows[i:i + batch_size]
+
 
+def iter_expenses(batch_size=10000):
+    """Yield every expense without loading all rows at once."""
+    for batch in iter_expense_batches(batch_size=batch_size):
+        yield from batch
 
+
+@tracing.traced()
+def fetch_expense_watermark():
+    """(row count, highest id) over the hot table and the archive."""
+    with get_db_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) AS n, COALESCE(MAX(id), 0) AS max_id FROM expenses")
+        row = cursor.fetchone()
+    cold_count, cold_max = archive.watermark()
+    return row["n"] + cold_count, max(row["max_id"], cold_max)
+
+
+@tracing.traced()
 def fetch_expense_summary(start_date, end_date):
     logger.info(f"fetch_expense_summary called with start: {start_date}, end: {end_date}")
     with get_db_cursor() as cursor:
         cursor.execute(
             '''SELECT category, SUM(amount) as total
-               FROM expense_manager.expenses WHERE expense_date BETWEEN %s and %s
+               FROM expenses WHERE expense_date BETWEEN %s and %s
                GROUP BY category; ''',
             (start_date, end_date)
         )
         data = cursor.fetchall()
-        return data
+    return _merge_totals(data, archive.summary_by_category(start_date, end_date), "category")
+
+@tracing.traced()
+def fetch_rollup(start_date, end_date, granularity, group_by_category=True):
+    """
+    Totals per period (and category) in one pass over the range.
+
+    Each row is {'period': <first day of the period>, 'category': …, 'total': …};
+    without grouping the category is always 'Total'.
+    """
+    logger.info(f"fetch_rollup called with start: {start_date}, end: {end_date}, {granularity}")
+    period = get_engine().period_sql[granularity]
+    category, group = ("category", "1, 2") if group_by_category else ("'Total'", "1")
+    with get_db_cursor() as cursor:
+        cursor.execute(
+            f'''SELECT {period} AS period, {category} AS category, SUM(amount) AS total
+                FROM expenses WHERE expense_date BETWEEN %s AND %s
+                GROUP BY {group};''',
+            (start_date, end_date)
+        )
+        data = cursor.fetchall()
+    return data + _engine_totals(archive.rollup(start_date, end_date, granularity, group_by_category))
+
 
+@tracing.traced()
 def fetch_monthly_expense_summary():
     """
-    Return all expenses aggregated by month in ascending order,
-    with a human-readable month label (e.g. 'August 2024').
+    Return all expenses aggregated by calendar month (across years), January first.
 
     Output sample:
-        [{'year_month': '2024-08',
-          'month_label': 'August 2024',
-          'total': 123.45}, …]
+        [{'month_name': 'August', 'total': 123.45}, …]
     """
     logger.info("fetch_monthly_expense_summary called (full history)")
 
-    query = """
-        SELECT  DATE_FORMAT(expense_date, '%M') AS month_name ,   -- 'August'
-        SUM(amount)                     AS total
-FROM    expense_manager.expenses
-GROUP BY MONTH(expense_date),                       -- 8, 9, …
-         DATE_FORMAT(expense_date, '%M')            -- 'August', 'September'
-ORDER BY MONTH(expense_date);                       -- Jan → Dec order
+    query = f"""
+        SELECT  {get_engine().month_number_sql} AS month_num,     -- 8, 9, …
+                SUM(amount)               AS total
+        FROM    expenses
+        GROUP BY 1
+        ORDER BY 1;                                         -- Jan → Dec order
     """
 
     with get_db_cursor() as cursor:
         cursor.execute(query)
+        data = cursor.fetchall()
+
+    totals = {row["month_num"]: row["total"] for row in data}
+    number = get_engine().total_type
+    for month, total in archive.summary_by_month().items():
+        totals[month] = totals.get(month, 0) + number(total)
+    return [{"month_name": calendar.month_name[month], "total": totals[month]}
+            for month in sorted(totals)]
+
+
+@tracing.traced()
+def fetch_category_total(category, start_date, end_date):
+    """One category's spend over a date range, hot table and archive."""
+    with get_db_cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(SUM(amount), 0) AS total FROM expenses "
+            "WHERE category = %s AND expense_date BETWEEN %s AND %s",
+            (category, start_date, end_date)
+        )
+        total = cursor.fetchone()["total"]
+    for row in _engine_totals(archive.summary_by_category(start_date, end_date)):
+        if row["category"] == category:
+            total += row["total"]
+    return total
+
+
+@tracing.traced()
+def fetch_budgets(categories=None):
+    """Every budget, or only those on the given categories."""
+    with get_db_cursor() as cursor:
+        if categories is None:
+            cursor.execute("SELECT * FROM budgets ORDER BY category, period")
+        elif not categories:
+            return []
+        else:
+            placeholders = ", ".join(["%s"] * len(categories))
+            cursor.execute(f"SELECT * FROM budgets WHERE category IN ({placeholders})", tuple(categories))
+        return cursor.fetchall()
+
+
+@tracing.traced()
+def insert_budget(category, period, amount, thresholds):
+    logger.info(f"insert_budget called with {category}, {period}, {amount}")
+    with get_db_cursor(commit=True) as cursor:
+        cursor.execute("INSERT INTO budgets (category, period, amount, thresholds) VALUES (%s, %s, %s, %s)",
+                       (category, period, amount, thresholds))
+        return cursor.lastrowid
+
+
+@tracing.traced()
+def delete_budget(budget_id):
+    """Delete a budget and its alerts; False if there was no such budget."""
+    logger.info(f"delete_budget called with {budget_id}")
+    with get_db_cursor(commit=True) as cursor:
+        cursor.execute("DELETE FROM budget_alerts WHERE budget_id = %s", (budget_id,))
+        cursor.execute("DELETE FROM budgets WHERE id = %s", (budget_id,))
+        return cursor.rowcount > 0
+
+
+@tracing.traced()
+def insert_budget_alerts(alerts):
+    """Store raised alerts, setting each one's `id`."""
+    with get_db_cursor(commit=True) as cursor:
+        for alert in alerts:
+            cursor.execute(
+                """INSERT INTO budget_alerts (budget_id, category, period, period_start, threshold,
+                                              budget_amount, total, expense_date, created_at)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                (alert["budget_id"], alert["category"], alert["period"], alert["period_start"],
+                 alert["threshold"], alert["budget_amount"], alert["total"], alert["expense_date"],
+                 alert["created_at"])
+            )
+            alert["id"] = cursor.lastrowid
+    return alerts
+
+
+@tracing.traced()
+def fetch_budget_alerts(after_id=0, limit=50):
+    """Alerts newer than `after_id`, newest first."""
+    with get_db_cursor() as cursor:
+        cursor.execute("SELECT * FROM budget_alerts WHERE id > %s ORDER BY id DESC LIMIT %s",
+                       (after_id, limit))
         return cursor.fetchall()
 
+
+def _engine_totals(cold_rows):
+    """Archive totals are Decimal; give them the engine's type (Decimal on MySQL, float on SQLite)."""
+    number = get_engine().total_type
+    return [{**row, "total": number(row["total"])} for row in cold_rows]
+
+
+def _merge_totals(hot_rows, cold_rows, key):
+    """Add cold archive totals into the hot table rows, matched on `key`."""
+    if not cold_rows:
+        return hot_rows
+
+    merged = {row[key]: dict(row) for row in hot_rows}
+    for row in _engine_totals(cold_rows):
+        if row[key] in merged:
+            merged[row[key]]["total"] += row["total"]
+        else:
+            merged[row[key]] = row
+    return list(merged.values())
+
 # if __name__ == "__main__":
 #     monthly_summary = fetch_monthly_expense_summary()
 #     print(monthly_summary)
@@ -0,0 +1,83 @@
+"""
+Server-Sent Events for live dashboards.
+
+Every committed write through /expenses/{date} publishes one small message with
+the per-category change in spend for that date.  Open dashboards apply the
+delta to the DataFrames they already hold instead of re-running the analytics
+queries.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+from collections import defaultdict
+
+from backend.archive import to_date
+
+
+KEEPALIVE_SECONDS = 15
+QUEUE_SIZE = 256
+
+
+def expense_deltas(old_rows, new_rows):
+    """{category: change in total} between the rows a date had and has now."""
+    change = defaultdict(float)
+    for row in old_rows:
+        change[row["category"]] -= float(row["amount"])
+    for row in new_rows:
+        change[row["category"]] += float(row["amount"])
+    return {category: round(amount, 2) for category, amount in change.items() if round(amount, 2) != 0}
+
+
+class DeltaBroker:
+    """Fans published messages out to every connected SSE client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # asyncio.Queue -> its event loop
+        self._ids = itertools.count(1)
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    @staticmethod
+    def _offer(queue, message):
+        if queue.full():
+            queue.get_nowait()  # slow client: drop its oldest delta, the id gap tells it to refetch
+        queue.put_nowait(message)
+
+    def publish(self, expense_date, deltas):
+        """Called from the request thread after the write has committed."""
+        if not deltas:
+            return
+        message = {"id": next(self._ids), "expense_date": to_date(expense_date).isoformat(), "deltas": deltas}
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, message)
+
+    async def stream(self, request):
+        """SSE body: one `delta` event per write, with keep-alive comments in between."""
+        queue = self.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {message['id']}\nevent: delta\ndata: {json.dumps(message)}\n\n"
+        finally:
+            self.unsubscribe(queue)
+
+
+delta_broker = DeltaBroker()
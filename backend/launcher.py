@@ -0,0 +1,54 @@
+"""
+Multi-worker launcher.
+
+    python -m backend.launcher --workers 4 --port 8000
+
+Runs backend.server:app under uvicorn with several worker processes that share
+one analytics snapshot (see backend.snapshot): the first worker to start
+builds it, every worker maps it read-only, and writes swap in a new one.  The
+snapshot lives in a scratch directory for the life of the launch unless
+EXPENSE_SNAPSHOT_PATH points somewhere else.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import uvicorn
+
+try:
+    import fcntl  # noqa: F401  (the snapshot's cross-process lock)
+except ImportError:
+    fcntl = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m backend.launcher", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    if args.workers > 1 and fcntl is None:
+        parser.error("several workers need flock(), which this platform does not have; use --workers 1")
+
+    scratch = None
+    if not os.environ.get("EXPENSE_SNAPSHOT_PATH"):
+        scratch = tempfile.mkdtemp(prefix="expense-snapshot-")
+        os.environ["EXPENSE_SNAPSHOT_PATH"] = os.path.join(scratch, "analytics.snap")
+    try:
+        # workers are fresh interpreters and inherit EXPENSE_SNAPSHOT_PATH from here
+        uvicorn.run("backend.server:app", host=args.host, port=args.port,
+                    workers=args.workers, log_level=args.log_level)
+    finally:
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
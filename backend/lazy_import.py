@@ -0,0 +1,33 @@
+"""
+Deferred imports of the heavy optional dependencies (pyarrow, NumPy).
+
+A module that only needs one of them on some code paths keeps the names it
+uses as None at import time and calls its loader before touching them:
+
+    pa = None
+    _load_pyarrow = deferred(globals(), _import_pyarrow)
+
+where `_import_pyarrow()` imports the package and returns {name: value} for
+every module global it sets up.  The first call runs it; concurrent first
+callers wait for that import instead of racing it, and every later call is a
+single flag check.
+"""
+
+import threading
+
+
+def deferred(namespace, build):
+    """A loader that installs `build()`'s names into `namespace` (a module's globals()) once."""
+    lock = threading.Lock()
+    done = False
+
+    def load():
+        nonlocal done
+        if done:
+            return
+        with lock:
+            if not done:
+                namespace.update(build())
+                done = True
+
+    return load
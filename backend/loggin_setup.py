@@ -7,7 +7,8 @@ def setup_logger(name, log_file = 'server.log', level = logging.DEBUG):
 
     # Configure the custom logger
     logger.setLevel(level)
-    file_handler = logging.FileHandler(log_file)
+    # delay: the file is opened by the first record, not when the module is imported
+    file_handler = logging.FileHandler(log_file, delay=True)
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
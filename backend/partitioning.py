@@ -0,0 +1,169 @@
+"""
+Monthly range partitioning of the `expenses` table and archival of closed years.
+
+The table is partitioned with RANGE COLUMNS(expense_date), one partition per
+month (p202408 holds August 2024) plus a catch-all `pmax`.  Every
+`expense_date BETWEEN …` query is then pruned by MySQL to the months it needs.
+
+    python -m backend.partitioning partition        # one-off conversion
+    python -m backend.partitioning maintain         # add upcoming months
+    python -m backend.partitioning archive 2023     # move 2023 to Parquet
+"""
+
+import argparse
+from datetime import date
+
+from backend import archive, db_helper
+from backend.loggin_setup import setup_logger
+
+
+logger = setup_logger("partitioning")
+
+MONTHS_AHEAD = 3
+
+
+def partition_name(year, month):
+    return f"p{year}{month:02d}"
+
+
+def _add_months(year, month, n):
+    index = year * 12 + (month - 1) + n
+    return index // 12, index % 12 + 1
+
+
+def _partition_clause(year, month):
+    next_year, next_month = _add_months(year, month, 1)
+    return (f"PARTITION {partition_name(year, month)} "
+            f"VALUES LESS THAN ('{next_year}-{next_month:02d}-01')")
+
+
+def _month_range(first, last):
+    """(year, month) tuples from `first` to `last` inclusive."""
+    months = []
+    year, month = first
+    while (year, month) <= last:
+        months.append((year, month))
+        year, month = _add_months(year, month, 1)
+    return months
+
+
+def list_partitions():
+    """Names of the current partitions in order, empty if not partitioned."""
+    if not db_helper.engine.supports_partitioning:
+        return []
+    with db_helper.get_db_cursor() as cursor:
+        cursor.execute(
+            '''SELECT PARTITION_NAME AS name
+               FROM information_schema.PARTITIONS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'expenses'
+                 AND PARTITION_NAME IS NOT NULL
+               ORDER BY PARTITION_ORDINAL_POSITION;'''
+        )
+        return [row["name"] for row in cursor.fetchall()]
+
+
+def partition_table(months_ahead=MONTHS_AHEAD):
+    """
+    Convert the plain `expenses` table into monthly partitions.
+
+    MySQL requires the partitioning column in every unique key, so the primary
+    key becomes (id, expense_date) first.
+    """
+    if not db_helper.engine.supports_partitioning:
+        raise RuntimeError(f"the {db_helper.engine.name} engine does not support partitioning")
+    if list_partitions():
+        logger.info("partition_table: expenses is already partitioned")
+        return
+
+    with db_helper.get_db_cursor() as cursor:
+        cursor.execute("SELECT MIN(expense_date) AS first FROM expenses")
+        first = cursor.fetchone()["first"] or date.today()
+
+    today = date.today()
+    last = _add_months(today.year, today.month, months_ahead)
+    clauses = [_partition_clause(y, m) for y, m in _month_range((first.year, first.month), last)]
+    clauses.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+
+    logger.info(f"partition_table creating {len(clauses)} partitions from {first}")
+    with db_helper.get_db_cursor(commit=True) as cursor:
+        cursor.execute("ALTER TABLE expenses DROP PRIMARY KEY, ADD PRIMARY KEY (id, expense_date)")
+        cursor.execute(
+            "ALTER TABLE expenses PARTITION BY RANGE COLUMNS(expense_date) (" + ", ".join(clauses) + ")"
+        )
+
+
+def ensure_partitions(months_ahead=MONTHS_AHEAD):
+    """Split `pmax` so the next `months_ahead` months each have a partition."""
+    existing = list_partitions()
+    if not existing:
+        logger.info("ensure_partitions: expenses is not partitioned, nothing to do")
+        return []
+
+    monthly = [name for name in existing if name != "pmax"]
+    today = date.today()
+    if monthly:
+        newest = monthly[-1]
+        start = _add_months(int(newest[1:5]), int(newest[5:7]), 1)
+    else:
+        start = (today.year, today.month)
+    missing = _month_range(start, _add_months(today.year, today.month, months_ahead))
+    if not missing:
+        return []
+
+    clauses = [_partition_clause(y, m) for y, m in missing]
+    clauses.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    logger.info(f"ensure_partitions adding {len(missing)} partitions")
+    with db_helper.get_db_cursor(commit=True) as cursor:
+        cursor.execute("ALTER TABLE expenses REORGANIZE PARTITION pmax INTO (" + ", ".join(clauses) + ")")
+    return [partition_name(y, m) for y, m in missing]
+
+
+def archive_year(year):
+    """
+    Move every row of a closed `year` into its Parquet file and drop the
+    year's partitions.  Returns the number of rows moved.
+    """
+    if year >= date.today().year:
+        raise ValueError(f"{year} is not a closed year yet")
+
+    # writes to the year wait, so nothing lands between the SELECT and the DELETE
+    with archive.write_lock:
+        with db_helper.get_db_cursor() as cursor:
+            cursor.execute(
+                "SELECT * FROM expenses WHERE expense_date BETWEEN %s AND %s",
+                (date(year, 1, 1), date(year, 12, 31))
+            )
+            rows = cursor.fetchall()
+
+        if rows:
+            archive.write_year(year, rows)
+
+        year_partitions = [name for name in list_partitions() if name.startswith(f"p{year}")]
+        with db_helper.get_db_cursor(commit=True) as cursor:
+            if year_partitions:
+                cursor.execute("ALTER TABLE expenses DROP PARTITION " + ", ".join(year_partitions))
+            # rows that landed in a neighbouring partition (or an unpartitioned table)
+            cursor.execute(
+                "DELETE FROM expenses WHERE expense_date BETWEEN %s AND %s",
+                (date(year, 1, 1), date(year, 12, 31))
+            )
+
+    logger.info(f"archive_year moved {len(rows)} rows of {year} to cold storage")
+    return len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage expenses partitions and archives")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("partition")
+    sub.add_parser("maintain")
+    archive_cmd = sub.add_parser("archive")
+    archive_cmd.add_argument("year", type=int)
+    args = parser.parse_args()
+
+    if args.command == "partition":
+        partition_table()
+    elif args.command == "maintain":
+        print(ensure_partitions())
+    else:
+        print(f"{archive_year(args.year)} rows archived")
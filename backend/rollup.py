@@ -0,0 +1,94 @@
+"""
+Period arithmetic and the dense pivot behind /analytics/rollup.
+
+A period is identified by the date it starts on: the day itself, the Monday
+of its week, the 1st of its month or January 1st of its year.  db_helper
+returns sparse (period, category, total) rows from one GROUP BY; `pivot`
+turns them into a periods x categories matrix with zeros for the gaps.
+"""
+
+from datetime import timedelta
+
+from backend.archive import to_date
+
+
+GRANULARITIES = ("day", "week", "month", "year")
+NO_GROUP = "Total"  # the single column name when group_by=none
+MAX_PERIODS = 5000  # rows of one dense matrix: ~13 years of days, far beyond any chart
+
+
+def period_start(day, granularity):
+    day = to_date(day)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def _next_period(start, granularity):
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start.replace(year=start.year + 1)
+
+
+def period_end(day, granularity):
+    """Last day of the period holding `day`."""
+    return _next_period(period_start(day, granularity), granularity) - timedelta(days=1)
+
+
+def count_periods(start_date, end_date, granularity):
+    """len(periods_between(...)) without building the list."""
+    first, last = period_start(start_date, granularity), period_start(end_date, granularity)
+    if granularity == "day":
+        return (last - first).days + 1
+    if granularity == "week":
+        return (last - first).days // 7 + 1
+    if granularity == "month":
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    return last.year - first.year + 1
+
+
+def periods_between(start_date, end_date, granularity):
+    """Every period start from the one holding start_date to the one holding end_date."""
+    periods = []
+    current, last = period_start(start_date, granularity), period_start(end_date, granularity)
+    while current <= last:
+        periods.append(current)
+        current = _next_period(current, granularity)
+    return periods
+
+
+def pivot(rows, start_date, end_date, granularity):
+    """
+    Dense matrix from sparse [{'period', 'category', 'total'}, …] rows:
+
+        {'periods': ['2024-08-01', …], 'categories': ['Food', …],
+         'values': [[12.5, 0.0, …], …], 'period_totals': […], 'category_totals': […]}
+    """
+    periods = periods_between(start_date, end_date, granularity)
+    categories = sorted({row["category"] for row in rows})
+    period_index = {p: i for i, p in enumerate(periods)}
+    category_index = {c: j for j, c in enumerate(categories)}
+
+    values = [[0.0] * len(categories) for _ in periods]
+    for row in rows:
+        i = period_index.get(to_date(row["period"]))
+        if i is not None:
+            values[i][category_index[row["category"]]] += float(row["total"])
+
+    values = [[round(v, 2) for v in line] for line in values]
+    return {
+        "granularity": granularity,
+        "periods": [p.isoformat() for p in periods],
+        "categories": categories,
+        "values": values,
+        "period_totals": [round(sum(line), 2) for line in values],
+        "category_totals": [round(sum(line[j] for line in values), 2) for j in range(len(categories))],
+    }
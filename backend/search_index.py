@@ -0,0 +1,169 @@
+"""
+In-process inverted index over expense notes.
+
+Notes are split into lowercase word tokens; each token maps to the set of
+expense ids whose notes contain it.  A sorted vocabulary lets a query term
+match every token that starts with it ("sam" finds "samosa").  The db_helper
+write functions keep the index current, and it can be pickled to disk so a
+restart does not tokenize every note again (the startup scan that feeds the
+statistics still reads the table).
+"""
+
+import bisect
+import heapq
+import os
+import pickle
+import re
+import threading
+
+from backend.archive import to_date
+from backend.loggin_setup import setup_logger
+
+
+logger = setup_logger("search_index")
+
+INDEX_PATH = os.environ.get("EXPENSE_SEARCH_INDEX")  # unset: keep the index in memory only
+FORMAT_VERSION = 1
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return _TOKEN.findall((text or "").lower())
+
+
+class InvertedIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}    # token -> set of expense ids
+        self._vocabulary = []  # sorted tokens, for prefix lookups
+        self._docs = {}        # expense id -> (date, category, amount, notes)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._vocabulary.clear()
+            self._docs.clear()
+
+    def _add(self, row):
+        expense_id = row["id"]
+        self._docs[expense_id] = (to_date(row["expense_date"]), row["category"],
+                                  float(row["amount"]), row["notes"])
+        for token in set(tokenize(row["notes"])):
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                bisect.insort(self._vocabulary, token)
+            ids.add(expense_id)
+
+    def add(self, row):
+        """Index one expense row; needs id, expense_date, category, amount and notes."""
+        with self._lock:
+            self._add(row)
+
+    def feed(self, rows):
+        """Index rows while passing them through, so one scan can feed other consumers."""
+        for row in rows:
+            self.add(row)
+            yield row
+
+    def remove(self, expense_id):
+        with self._lock:
+            doc = self._docs.pop(expense_id, None)
+            if doc is None:
+                return
+            for token in set(tokenize(doc[3])):
+                ids = self._postings.get(token)
+                if ids is None:
+                    continue
+                ids.discard(expense_id)
+                if not ids:
+                    del self._postings[token]
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+    def _matching(self, term, prefix):
+        if not prefix:
+            return self._postings.get(term, set())
+        ids = set()
+        start = bisect.bisect_left(self._vocabulary, term)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            ids |= self._postings[token]
+        return ids
+
+    def search(self, query, category=None, start_date=None, end_date=None, prefix=True, limit=50):
+        """Expenses whose notes contain every query term, newest first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        start_date = to_date(start_date) if start_date else None
+        end_date = to_date(end_date) if end_date else None
+
+        with self._lock:
+            candidates = sorted((self._matching(t, prefix) for t in terms), key=len)
+            ids = set(candidates[0]).intersection(*candidates[1:])
+
+            matches = []
+            for expense_id in ids:
+                expense_date, doc_category, _, _ = self._docs[expense_id]
+                if category and doc_category != category:
+                    continue
+                if start_date and expense_date < start_date:
+                    continue
+                if end_date and expense_date > end_date:
+                    continue
+                matches.append((expense_date, expense_id))
+
+            # a short prefix can match most notes: keep the newest `limit` without sorting them all
+            results = []
+            for expense_date, expense_id in heapq.nlargest(limit, matches):
+                _, doc_category, amount, notes = self._docs[expense_id]
+                results.append({"id": expense_id, "expense_date": expense_date, "amount": amount,
+                                "category": doc_category, "notes": notes})
+        return results
+
+    def watermark(self):
+        """(row count, highest id), compared with the table to detect a stale file."""
+        with self._lock:
+            return len(self._docs), max(self._docs, default=0)
+
+    def save(self, path=None):
+        """Pickle the index to `path` (default EXPENSE_SEARCH_INDEX); no-op without a path."""
+        path = path or INDEX_PATH
+        if not path:
+            return
+        with self._lock:
+            state = (FORMAT_VERSION, self._postings, self._vocabulary, self._docs)
+            tmp_path = f"{path}.{os.getpid()}.tmp"  # every worker saves at shutdown
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        logger.info(f"search index saved to {path} ({len(self._docs)} notes)")
+
+    def load(self, path=None):
+        """Load a saved index; returns False if the file is missing, unreadable or from another version."""
+        path = path or INDEX_PATH
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+            if state[0] != FORMAT_VERSION:
+                return False
+            _, postings, vocabulary, docs = state
+        except (pickle.UnpicklingError, EOFError, ValueError, TypeError, IndexError) as e:
+            # e.g. a save cut short by a crash: rebuild from the table instead
+            logger.error(f"search index at {path} is unreadable, rebuilding it: {e!r}")
+            return False
+        with self._lock:
+            self._postings, self._vocabulary, self._docs = postings, vocabulary, docs
+        logger.info(f"search index loaded from {path} ({len(self._docs)} notes)")
+        return True
+
+
+search_index = InvertedIndex()
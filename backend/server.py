@@ -1,13 +1,125 @@
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager, nullcontext, suppress
 from datetime import date
 
-from tenacity import retry_if_exception
-
-from backend import db_helper
-from fastapi import FastAPI, HTTPException
-from typing import List
+from backend import archive, arrow_format, db_helper, partitioning, rollup, tracing
+from backend.budgets import DEFAULT_THRESHOLDS, budget_from_row, budget_monitor
+from backend.events import delta_broker, expense_deltas
+from backend.forecast import spend_forecaster
+from backend.search_index import search_index
+from backend.snapshot import FeedReplaced, shared_analytics
+from backend.stats import expense_stats
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 import math
-app = FastAPI()
+
+
+# set once the startup scan is done: until then writes wait for it and the
+# statistics and search endpoints answer 503
+startup_done = threading.Event()
+
+
+def load_state():
+    """
+    Everything the server builds from the database at startup.  It runs in the
+    background, so the time to start serving does not grow with the history.
+    """
+    try:
+        # keep a partition ready for the coming months so inserts never hit pmax
+        try:
+            partitioning.ensure_partitions()
+        except db_helper.engine.Error as e:
+            partitioning.logger.error(f"ensure_partitions failed at startup: {e}")
+        # one scan at startup, every later write keeps the sketches and the index current;
+        # with several workers no write can land between the scan and following the change feed
+        with shared_analytics.lock():
+            try:
+                rows = db_helper.iter_expenses()
+                if search_index.load() \
+                        and search_index.watermark() == db_helper.fetch_expense_watermark():
+                    expense_stats.rebuild(rows)
+                else:
+                    search_index.clear()
+                    expense_stats.rebuild(search_index.feed(rows))
+                if shared_analytics.enabled:
+                    shared_analytics.ensure(lambda: db_helper.fetch_rollup(date.min, date.max, "day"),
+                                            db_helper.fetch_expense_watermark())
+            except db_helper.engine.Error as e:
+                db_helper.logger.error(f"loading expense statistics failed at startup: {e}")
+    finally:
+        startup_done.set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_done.clear()
+    loader = asyncio.create_task(asyncio.to_thread(load_state))
+    follower = asyncio.create_task(follow_other_workers()) if shared_analytics.enabled else None
+    yield
+    if follower is not None:
+        follower.cancel()
+        with suppress(asyncio.CancelledError):
+            await follower
+    await loader  # a thread cannot be cancelled; saving a half-built index would be worse
+    search_index.save()
+
+
+FOLLOW_SECONDS = 0.25
+
+
+def catch_up():
+    """
+    Replay writes made by other workers into this worker's sketches, index,
+    budget totals and SSE clients.  Reading the feed and applying it happen
+    under the snapshot lock, so a write that catches up sees every change applied.
+    """
+    with shared_analytics.lock():
+        try:
+            changes = shared_analytics.changes()
+        except FeedReplaced:
+            # the changes this worker missed are gone with the old feed: reload everything
+            try:
+                search_index.clear()
+                expense_stats.rebuild(search_index.feed(db_helper.iter_expenses()))
+                budget_monitor.clear()
+                shared_analytics.skip_feed()
+            except db_helper.engine.Error as e:
+                db_helper.logger.error(f"reloading expense statistics failed: {e}")
+            return
+        for change in changes:
+            expense_date = change["expense_date"]
+            for row in change["deleted"]:
+                expense_stats.remove(expense_date, row["category"], row["amount"])
+                search_index.remove(row["id"])
+            for row in change["inserted"]:
+                expense_stats.record(expense_date, row["category"], row["amount"])
+                search_index.add({**row, "expense_date": expense_date})
+            deltas = expense_deltas(change["deleted"], change["inserted"])
+            budget_monitor.observe(expense_date, deltas, change["generation"])
+            delta_broker.publish(expense_date, deltas)
+
+
+async def follow_other_workers():
+    while True:
+        await asyncio.sleep(FOLLOW_SECONDS)
+        if startup_done.is_set():  # the startup scan skips the feed up to where it read
+            await asyncio.to_thread(catch_up)  # waits for the snapshot lock
+
+
+def expense_summary(start_date, end_date):
+    """Per-category totals, from the shared snapshot when serving with several workers."""
+    snapshot = shared_analytics.current()
+    if snapshot is not None:
+        return snapshot.summary(start_date, end_date)
+    return db_helper.fetch_expense_summary(start_date, end_date)
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(tracing.TracingMiddleware)
 
 
 class Expense(BaseModel):
@@ -20,7 +132,18 @@ class DateRange(BaseModel):
     start_date: date
     end_date: date
 
+@app.get("/expenses")
+@tracing.traced()
+def get_expenses_between(start_date: date, end_date: date, request: Request):
+    """Every expense in a date range (bulk read / export), as JSON or an Arrow stream."""
+    batches = db_helper.iter_expense_batches(start_date, end_date)
+    if arrow_format.wants_arrow(request):
+        return arrow_format.arrow_response(batches, arrow_format.EXPENSE_SCHEMA)
+    return [row for batch in batches for row in batch]
+
+
 @app.get("/expenses/{expense_date}", response_model = List[Expense])
+@tracing.traced()
 def get_expenses(expense_date: date):
     expenses = db_helper.fetch_expenses_for_date(expense_date)
     if expenses is None:
@@ -29,17 +152,48 @@ def get_expenses(expense_date: date):
 
 
 @app.post("/expenses/{expense_date}")
+@tracing.traced()
 def add_or_update_expense(expense_date: date, expenses: List[Expense]):
-    db_helper.delete_expense_for_date(expense_date)
-    for expense in expenses:
-        db_helper.insert_expense(expense_date, expense.amount, expense.category, expense.notes)
+    # a closed year may be being archived: its rows must not move under this write
+    closed_year = archive.write_lock if expense_date.year < date.today().year else nullcontext()
+    startup_done.wait()  # the startup scan must not also see rows this write adds
+    with shared_analytics.lock(), closed_year:
+        if shared_analytics.enabled:
+            catch_up()  # budget totals must hold every write committed before this one
+        deleted = db_helper.delete_expense_for_date(expense_date)
+        inserted = []
+        for expense in expenses:
+            expense_id = db_helper.insert_expense(expense_date, expense.amount, expense.category, expense.notes)
+            inserted.append({"id": expense_id, **expense.model_dump()})
+        snapshot = None
+        if shared_analytics.enabled:
+            shared_analytics.record_write(expense_date, deleted, inserted)
+            snapshot = shared_analytics.current()
+
+        # only the budgets on categories this write changed are checked
+        deltas = expense_deltas(deleted, inserted)
+        budgets = [budget_from_row(row) for row in db_helper.fetch_budgets(list(deltas))]
+        alerts = budget_monitor.evaluate(expense_date, deltas, budgets, db_helper.fetch_category_total,
+                                         snapshot.header["generation"] if snapshot is not None else None)
+        if alerts:
+            db_helper.insert_budget_alerts(alerts)
 
-    return {"message": "Expense updated successfully"}
+    delta_broker.publish(expense_date, deltas)
+    return {"message": "Expense updated successfully", "alerts": alerts}
+
+
+@app.get("/events/analytics")
+@tracing.traced()
+async def analytics_events(request: Request):
+    """Server-Sent Events stream of per-category spend deltas, one event per write."""
+    return StreamingResponse(delta_broker.stream(request), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.post("/analytics")
-def get_analytics(date_range: DateRange):
-    data = db_helper.fetch_expense_summary(date_range.start_date, date_range.end_date)
+@tracing.traced()
+def get_analytics(date_range: DateRange, request: Request):
+    data = expense_summary(date_range.start_date, date_range.end_date)
     if data is None:
         raise HTTPException(status_code=500, detail="Failed to retrieve expense summary from the database.")
 
@@ -53,29 +207,167 @@ def get_analytics(date_range: DateRange):
             "percentage": percentage,
         }
 
+    if arrow_format.wants_arrow(request):
+        rows = [{"category": category, **values} for category, values in breakdown.items()]
+        return arrow_format.arrow_response([rows], arrow_format.SUMMARY_SCHEMA)
     return breakdown
 
 
 @app.get("/analytics/monthly")
-def get_monthly_analytics():
-    data = db_helper.fetch_monthly_expense_summary()
+@tracing.traced()
+def get_monthly_analytics(request: Request):
+    snapshot = shared_analytics.current()
+    data = snapshot.monthly() if snapshot is not None else db_helper.fetch_monthly_expense_summary()
     if data is None:
         raise HTTPException(status_code=500, detail="Failed to retrieve monthly analytics.")
+    if arrow_format.wants_arrow(request):
+        return arrow_format.arrow_response([data], arrow_format.MONTHLY_SCHEMA)
     return data
 
+@app.get("/analytics/rollup")
+@tracing.traced()
+def get_rollup(start_date: date, end_date: date, request: Request,
+               granularity: Literal["day", "week", "month", "year"] = "month",
+               group_by: Literal["category", "none"] = "category"):
+    """Dense periods x categories matrix of totals, computed in one query pass."""
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date.")
+    if rollup.count_periods(start_date, end_date, granularity) > rollup.MAX_PERIODS:
+        raise HTTPException(status_code=400, detail=f"The range holds more than {rollup.MAX_PERIODS} "
+                                                    f"{granularity} periods; use a coarser granularity.")
+    snapshot = shared_analytics.current()
+    if snapshot is not None:
+        rows = snapshot.rollup(start_date, end_date, granularity, group_by == "category")
+    else:
+        rows = db_helper.fetch_rollup(start_date, end_date, granularity, group_by == "category")
+    if rows is None:
+        raise HTTPException(status_code=500, detail="Failed to retrieve rollup from the database.")
+
+    matrix = rollup.pivot(rows, start_date, end_date, granularity)
+    if arrow_format.wants_arrow(request):
+        schema = arrow_format.rollup_schema(matrix["categories"])
+        records = [{"period": period, **dict(zip(matrix["categories"], line))}
+                   for period, line in zip(matrix["periods"], matrix["values"])]
+        return arrow_format.arrow_response([records], schema)
+    return matrix
+
+
+@app.get("/analytics/distribution")
+@tracing.traced()
+def get_distribution(category: str, month: Optional[str] = None):
+    """Count, mean and quantiles of single expenses for a category (optionally one 'YYYY-MM')."""
+    if not expense_stats.loaded:
+        raise HTTPException(status_code=503, detail="Expense statistics are not loaded yet.")
+    data = expense_stats.distribution(category, month)
+    if data is None:
+        raise HTTPException(status_code=404, detail="No expenses for that category.")
+    return data
+
+
+@app.get("/analytics/trends")
+@tracing.traced()
+def get_trends():
+    """Exponentially weighted moving average of monthly totals per category."""
+    if not expense_stats.loaded:
+        raise HTTPException(status_code=503, detail="Expense statistics are not loaded yet.")
+    return expense_stats.trends()
+
+
+@app.get("/forecast")
+@tracing.traced()
+def get_forecast(periods: int = 3):
+    """Projected spend per category for the next `periods` months."""
+    if not 1 <= periods <= 24:
+        raise HTTPException(status_code=400, detail="periods must be between 1 and 24.")
+    if not expense_stats.loaded:
+        raise HTTPException(status_code=503, detail="Expense statistics are not loaded yet.")
+    return spend_forecaster.forecast(periods)
+
+
+@app.get("/search")
+@tracing.traced()
+def search_notes(q: str, category: Optional[str] = None, start_date: Optional[date] = None,
+                 end_date: Optional[date] = None, prefix: bool = True, limit: int = 50):
+    """Expenses whose notes contain every word of `q` (prefix matches by default)."""
+    if not expense_stats.loaded:  # the index is fed by the same startup scan
+        raise HTTPException(status_code=503, detail="The search index is not loaded yet.")
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive.")
+    return search_index.search(q, category, start_date, end_date, prefix, min(limit, 1000))
+
+
+@app.post("/archive/{year}")
+@tracing.traced()
+def archive_year(year: int):
+    """Move a closed year from the hot table into its Parquet cold file."""
+    try:
+        with shared_analytics.lock():  # other workers' writes wait too
+            rows = partitioning.archive_year(year)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"year": year, "rows_archived": rows}
+
+class Budget(BaseModel):
+    category: str
+    period: Literal["week", "month", "year"] = "month"
+    amount: float
+    thresholds: List[float] = list(DEFAULT_THRESHOLDS)  # fractions of `amount` that raise an alert
+
+
+@app.get("/budgets")
+@tracing.traced()
+def get_budgets():
+    return [budget_from_row(row) for row in db_helper.fetch_budgets()]
+
+
+@app.post("/budgets")
+@tracing.traced()
+def add_budget(budget: Budget):
+    """Create a budget; alerts are raised by the writes that cross its thresholds from now on."""
+    if budget.amount <= 0:
+        raise HTTPException(status_code=400, detail="amount must be positive.")
+    if not budget.thresholds or any(t <= 0 for t in budget.thresholds):
+        raise HTTPException(status_code=400, detail="thresholds must be positive fractions of amount.")
+    thresholds = sorted(set(budget.thresholds))
+    budget_id = db_helper.insert_budget(budget.category, budget.period, budget.amount, json.dumps(thresholds))
+    return {"id": budget_id, **budget.model_dump(), "thresholds": thresholds}
+
+
+@app.delete("/budgets/{budget_id}")
+@tracing.traced()
+def delete_budget(budget_id: int):
+    if not db_helper.delete_budget(budget_id):
+        raise HTTPException(status_code=404, detail="No such budget.")
+    return {"message": "Budget deleted"}
+
+
+@app.get("/alerts")
+@tracing.traced()
+def get_alerts(after_id: int = 0, limit: int = 50):
+    """Budget alerts newer than `after_id`, newest first."""
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive.")
+    return db_helper.fetch_budget_alerts(after_id, min(limit, 500))
+
+
 class SavingsRequest(BaseModel):
     target: float          # $ you want to put aside
     start_date: date
     end_date: date
     period: str            # "week" or "month"
+    use_forecast: bool = False  # rank categories by projected instead of past spend
 
 class SavingsAdvice(BaseModel):
     category: str
     save_per_period: float
     period: str
     num_periods: int
+    projected_spend: Optional[float] = None  # next month's forecast for `category`
 
 @app.post("/savings_plan", response_model=SavingsAdvice)
+@tracing.traced()
 def savings_plan(req: SavingsRequest):
     """
     Suggest trimming the largest *discretionary* category to reach a target.
@@ -84,7 +376,7 @@ def savings_plan(req: SavingsRequest):
     mandatory = {"rent", "mortgage", "utilities", "insurance", "taxes"}
 
     # 1. totals per category for the requested window
-    summary = db_helper.fetch_expense_summary(req.start_date, req.end_date)
+    summary = expense_summary(req.start_date, req.end_date)
     if not summary:
         raise HTTPException(status_code=404, detail="No expenses in that range.")
 
@@ -97,7 +389,15 @@ def savings_plan(req: SavingsRequest):
             detail="No discretionary spending found to cut. Nice job!"
         )
 
-    top = max(discretionary, key=lambda r: r["total"])
+    projected = {}
+    if req.use_forecast and expense_stats.loaded:
+        projected = {category: f["amounts"][0] for category, f in spend_forecaster.forecast(1).items()}
+        discretionary = [row for row in discretionary if row["category"] in projected] or discretionary
+
+    if projected:
+        top = max(discretionary, key=lambda r: projected.get(r["category"], 0))
+    else:
+        top = max(discretionary, key=lambda r: r["total"])
 
     # 3. how many weeks or months in the window?
     days = (req.end_date - req.start_date).days or 1
@@ -115,4 +415,5 @@ def savings_plan(req: SavingsRequest):
         save_per_period=save_each,
         period=req.period,
         num_periods=periods,
+        projected_spend=projected.get(top["category"]),
     )
\ No newline at end of file
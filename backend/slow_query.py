@@ -0,0 +1,105 @@
+"""
+Per-query timing and the slow-query log.
+
+Every db_helper cursor is wrapped in a TracedCursor, which opens execute/fetch
+spans and times each statement by the time spent inside its execute and fetch
+calls.  A streamed read is resumed between batches while the response is
+serialized and sent, and that time is not the database's.  Statements
+slower than EXPENSE_SLOW_QUERY_MS (default 200) are written to
+slow_query.log as one JSON object per line: SQL, parameters, row count,
+duration, request id and the engine's EXPLAIN output.  EXPLAIN runs after the
+original cursor is released, on its own cursor, and on the statement as it was
+sent: only the logged copy has its whitespace collapsed, since joining the lines
+of a statement with `--` comments would comment out the rest of it.
+"""
+
+import json
+import os
+import time
+
+from backend import tracing
+from backend.loggin_setup import setup_logger
+
+
+THRESHOLD_MS = float(os.environ.get("EXPENSE_SLOW_QUERY_MS", "200"))
+
+logger = setup_logger("slow_query", log_file=os.environ.get("EXPENSE_SLOW_QUERY_LOG", "slow_query.log"))
+
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+
+class TracedCursor:
+    """Wraps an engine cursor; `slow` collects statements over the threshold."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._query = None
+        self.slow = []
+
+    def _finish_query(self):
+        if self._query is None:
+            return
+        sql, params, elapsed, rows = self._query
+        elapsed_ms = elapsed * 1000
+        self._query = None
+        if elapsed_ms >= THRESHOLD_MS:
+            self.slow.append({"sql": sql, "params": params, "rows": rows,
+                              "duration_ms": round(elapsed_ms, 2), "request_id": tracing.request_id()})
+
+    def execute(self, query, params=()):
+        self._finish_query()
+        self._query = [query, params, 0.0, 0]
+        started = time.perf_counter()
+        try:
+            with tracing.span("db.execute", **{"db.statement": " ".join(query.split())[:500]}):
+                return self._cursor.execute(query, params)
+        finally:
+            self._query[2] += time.perf_counter() - started
+
+    def executemany(self, query, seq_of_params):
+        self._finish_query()
+        with tracing.span("db.executemany", **{"db.statement": " ".join(query.split())[:500]}):
+            return self._cursor.executemany(query, seq_of_params)
+
+    def _fetched(self, result, started):
+        if self._query is not None:
+            self._query[2] += time.perf_counter() - started
+            self._query[3] += len(result) if isinstance(result, list) else int(result is not None)
+        return result
+
+    def fetchone(self):
+        with tracing.span("db.fetch"):
+            started = time.perf_counter()
+            return self._fetched(self._cursor.fetchone(), started)
+
+    def fetchmany(self, size):
+        with tracing.span("db.fetch", **{"db.batch_size": size}):
+            started = time.perf_counter()
+            return self._fetched(self._cursor.fetchmany(size), started)
+
+    def fetchall(self):
+        with tracing.span("db.fetch") as s:
+            started = time.perf_counter()
+            rows = self._fetched(self._cursor.fetchall(), started)
+            if s is not None:
+                s.attributes["db.rows"] = len(rows)
+            return rows
+
+    def close_query(self):
+        self._finish_query()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def explain_and_log(engine, slow):
+    """Attach EXPLAIN output to each slow statement and write it to the log."""
+    for entry in slow:
+        if entry["sql"].lstrip().upper().startswith(_EXPLAINABLE):
+            try:
+                with engine.cursor() as cursor:
+                    cursor.execute(engine.explain_prefix + entry["sql"], entry["params"])
+                    entry["explain"] = cursor.fetchall()
+            except engine.Error as e:
+                entry["explain_error"] = str(e)
+        logger.warning(json.dumps({**entry, "sql": " ".join(entry["sql"].split())}, default=str))
@@ -0,0 +1,399 @@
+"""
+Per-day, per-category spend totals shared by every worker process.
+
+With several uvicorn workers (see backend.launcher) the analytics endpoints
+read one compact snapshot instead of each worker querying the database.  The
+snapshot is a single file, EXPENSE_SNAPSHOT_PATH:
+
+    b"EXPSNAP1" | header length (u64) | JSON header | padding | rows
+
+where the rows are a packed NumPy array (day as days since 1970-01-01,
+category code, total) sorted by day.  Every worker maps the file read-only and
+answers from it zero-copy; a range query is two binary searches and a bincount.
+
+Writers never modify the mapped file.  Under an exclusive flock on
+`<path>.lock` the writing worker copies the rows, replaces the day it wrote,
+writes a new file and os.replace()s it over the old one, so readers see
+either the old or the new snapshot and notice the swap with one stat().  The
+first worker to start builds the snapshot from one GROUP BY; the others find
+it in place, as long as its watermark still matches the database.
+
+The same lock guards an append-only change feed, `<path>.changes`, with the
+rows each write deleted and inserted.  Workers replay other workers' writes
+from it into their own statistics, search index and SSE subscribers.  A
+rebuild starts a fresh feed; a worker that finds its feed replaced gets
+FeedReplaced and reloads its state from the database.  Each worker records
+how far it has read in `<path>.readers`; once every live worker has read a
+feed past FEED_COMPACT_BYTES to its end, the reader that notices truncates it
+in place and bumps the readers' epoch, so the others restart at offset 0.
+"""
+
+import calendar
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date
+
+try:
+    import fcntl
+except ImportError:  # no flock on Windows: only single-process serving is coherent
+    fcntl = None
+
+from backend.archive import to_date
+from backend.lazy_import import deferred
+from backend.loggin_setup import setup_logger
+
+
+logger = setup_logger("snapshot")
+
+SNAPSHOT_PATH = os.environ.get("EXPENSE_SNAPSHOT_PATH")  # unset: every worker queries the database
+MAGIC = b"EXPSNAP1"
+_ALIGN = 64
+FEED_COMPACT_BYTES = 1 << 20  # a fully read feed at least this large is truncated
+
+# NumPy is only needed once a snapshot is built or read, which single-process
+# serving never does, so it is not imported with the module
+np = ROW = _EPOCH = None
+
+
+def _import_numpy():
+    import numpy
+
+    return {"np": numpy,
+            "ROW": numpy.dtype([("day", "<i4"), ("category", "<u2"), ("total", "<f8")]),
+            "_EPOCH": numpy.datetime64("1970-01-01", "D")}
+
+
+_load_numpy = deferred(globals(), _import_numpy)
+
+
+def day_number(day):
+    _load_numpy()
+    return int((np.datetime64(to_date(day), "D") - _EPOCH).astype(np.int64))
+
+
+class Snapshot:
+    """An immutable view over one snapshot file (or in-memory rows)."""
+
+    def __init__(self, rows, categories, header):
+        _load_numpy()
+        self.rows = rows
+        self.categories = categories
+        self.header = header
+
+    @classmethod
+    def open(cls, path):
+        _load_numpy()
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:8] != MAGIC:
+            raise ValueError(f"{path} is not an expense snapshot")
+        (length,) = struct.unpack_from("<Q", mapped, 8)
+        header = json.loads(mapped[16:16 + length])
+        rows = np.frombuffer(mapped, dtype=ROW, count=header["rows"], offset=header["offset"])
+        return cls(rows, header["categories"], header)
+
+    def write(self, path):
+        """Write to a temporary file and atomically swap it in at `path`."""
+        header = {**self.header, "categories": self.categories, "rows": len(self.rows)}
+        for _ in range(2):  # the offset is part of the header, so its length may shift once
+            encoded = json.dumps(header).encode()
+            header["offset"] = -(-(16 + len(encoded)) // _ALIGN) * _ALIGN
+        encoded = json.dumps(header).encode()
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(encoded)) + encoded)
+            f.write(b"\0" * (header["offset"] - 16 - len(encoded)))
+            f.write(np.ascontiguousarray(self.rows, dtype=ROW).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _between(self, start_date, end_date):
+        days = self.rows["day"]
+        lo = np.searchsorted(days, day_number(start_date), side="left")
+        hi = np.searchsorted(days, day_number(end_date), side="right")
+        return self.rows[lo:hi]
+
+    def summary(self, start_date, end_date):
+        """[{'category', 'total'}] for the range, like db_helper.fetch_expense_summary."""
+        rows = self._between(start_date, end_date)
+        n = len(self.categories)
+        present = np.bincount(rows["category"], minlength=n)
+        totals = np.bincount(rows["category"], weights=rows["total"], minlength=n)
+        return [{"category": self.categories[i], "total": round(float(totals[i]), 2)}
+                for i in np.flatnonzero(present)]
+
+    def monthly(self):
+        """[{'month_name', 'total'}] across years, like db_helper.fetch_monthly_expense_summary."""
+        months = self.rows["day"].astype("M8[D]").astype("M8[M]").astype(np.int64) % 12
+        present = np.bincount(months, minlength=12)
+        totals = np.bincount(months, weights=self.rows["total"], minlength=12)
+        return [{"month_name": calendar.month_name[m + 1], "total": round(float(totals[m]), 2)}
+                for m in np.flatnonzero(present)]
+
+    def rollup(self, start_date, end_date, granularity, group_by_category=True):
+        """Sparse [{'period', 'category', 'total'}] rows, like db_helper.fetch_rollup."""
+        rows = self._between(start_date, end_date)
+        days = rows["day"].astype(np.int64)
+        if granularity == "week":
+            days = days - (days + 3) % 7  # 1970-01-01 was a Thursday
+        elif granularity == "month":
+            days = days.astype("M8[D]").astype("M8[M]").astype("M8[D]").astype(np.int64)
+        elif granularity == "year":
+            days = days.astype("M8[D]").astype("M8[Y]").astype("M8[D]").astype(np.int64)
+
+        width = max(len(self.categories), 1) if group_by_category else 1
+        codes = rows["category"].astype(np.int64) if group_by_category else 0
+        keys, inverse = np.unique(days * width + codes, return_inverse=True)
+        totals = np.bincount(inverse, weights=rows["total"], minlength=len(keys))
+
+        periods = (keys // width).astype("M8[D]").tolist()
+        return [{"period": period,
+                 "category": self.categories[key % width] if group_by_category else "Total",
+                 "total": round(float(total), 2)}
+                for period, key, total in zip(periods, keys.tolist(), totals)]
+
+    def replace_day(self, expense_date, rows):
+        """New Snapshot with the totals of `expense_date` recomputed from its rows."""
+        day = day_number(expense_date)
+        categories = list(self.categories)
+        codes = {c: i for i, c in enumerate(categories)}
+        totals = defaultdict(float)
+        for row in rows:
+            if row["category"] not in codes:
+                codes[row["category"]] = len(categories)
+                categories.append(row["category"])
+            totals[codes[row["category"]]] += float(row["amount"])
+
+        fresh = np.array([(day, code, totals[code]) for code in sorted(totals)], dtype=ROW)
+        days = self.rows["day"]
+        lo = np.searchsorted(days, day, side="left")
+        hi = np.searchsorted(days, day, side="right")
+        merged = np.concatenate([self.rows[:lo], fresh, self.rows[hi:]])
+        return Snapshot(merged, categories, dict(self.header))
+
+
+def from_rollup(rows, watermark):
+    """Snapshot from db_helper.fetch_rollup(…, 'day') rows."""
+    _load_numpy()
+    categories = sorted({row["category"] for row in rows})
+    codes = {c: i for i, c in enumerate(categories)}
+    data = np.array([(day_number(row["period"]), codes[row["category"]], float(row["total"]))
+                     for row in rows], dtype=ROW)
+    data.sort(order=["day", "category"])
+    return Snapshot(data, categories, {"generation": 0, "watermark": list(watermark)})
+
+
+class FeedReplaced(Exception):
+    """The snapshot was rebuilt since the last read: changes left in the old feed are gone."""
+
+
+class SharedAnalytics:
+    """The worker-side handle: lock, build, read, write and follow the change feed."""
+
+    def __init__(self, path=SNAPSHOT_PATH):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._current = None
+        self._stat = None
+        self._feed = (None, 0)  # (inode, offset) of the change feed read so far
+        self._epoch = 0  # truncations of the feed seen so far
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    @contextmanager
+    def lock(self):
+        """
+        Exclusive across threads and processes; re-entrant within a thread.
+        Without a snapshot path it still serializes this process's writers.
+        """
+        with self._thread_lock:
+            if not self.enabled or fcntl is None:
+                yield
+                return
+            if self._lock_depth == 0:
+                self._lock_file = open(f"{self.path}.lock", "a")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def current(self):
+        """The latest snapshot, re-mapped only when the file was swapped; None before the first build."""
+        if not self.enabled:
+            return None
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if key != self._stat:
+            self._current, self._stat = Snapshot.open(self.path), key
+        return self._current
+
+    def ensure(self, load_rows, watermark):
+        """
+        Build the snapshot unless a current one exists.  Call under lock();
+        `load_rows` is only called when a build is needed.
+        """
+        feed = f"{self.path}.changes"
+        if os.path.exists(self.path):
+            existing = self.current()
+            if existing.header["watermark"] == list(watermark):
+                self.skip_feed()
+                return False
+            generation = existing.header["generation"] + 1
+        else:
+            generation = 1
+
+        built = from_rollup(load_rows(), watermark)
+        built.header["generation"] = generation
+        built.write(self.path)
+        # a fresh feed: the new snapshot includes everything the old one held
+        open(f"{feed}.tmp", "w").close()
+        os.replace(f"{feed}.tmp", feed)
+        self._feed = (os.stat(feed).st_ino, 0)
+        self._epoch = self._readers()["epoch"] + 1
+        self._save_readers({"epoch": self._epoch, "offsets": {str(os.getpid()): 0}})
+        logger.info(f"built analytics snapshot: {len(built.rows)} day/category rows, generation {generation}")
+        return True
+
+    def skip_feed(self):
+        """Start following the feed from its end: the caller's state already includes it."""
+        try:
+            st = os.stat(f"{self.path}.changes")
+        except FileNotFoundError:
+            return
+        self._feed = (st.st_ino, st.st_size)
+        readers = self._readers()
+        self._epoch = readers["epoch"]
+        self._note_offset(readers, st.st_size)
+
+    def record_write(self, expense_date, deleted, inserted):
+        """
+        Swap in the snapshot with `expense_date` replaced by `inserted` and
+        append the change to the feed.  Call under lock(), after the commit.
+        """
+        old = self.current()
+        if old is None:  # never built (the database was down at startup): readers use the database
+            return
+        count, max_id = old.header["watermark"]
+        new = old.replace_day(expense_date, inserted)
+        new.header["generation"] = generation = old.header["generation"] + 1
+        new.header["watermark"] = [count - len(deleted) + len(inserted),
+                                   max([max_id] + [row["id"] for row in inserted])]
+        new.write(self.path)
+
+        change = {
+            "generation": generation,
+            "pid": os.getpid(),
+            "expense_date": to_date(expense_date).isoformat(),
+            "deleted": [{"id": row["id"], "category": row["category"], "amount": float(row["amount"])}
+                        for row in deleted],
+            "inserted": [{"id": row["id"], "category": row["category"], "amount": float(row["amount"]),
+                          "notes": row["notes"]} for row in inserted],
+        }
+        with open(f"{self.path}.changes", "a") as f:
+            f.write(json.dumps(change) + "\n")
+
+    def changes(self):
+        """
+        Writes made by other processes since the last call, oldest first.
+        Raises FeedReplaced when the snapshot was rebuilt meanwhile; the caller
+        reloads its state under lock() and calls skip_feed().
+        """
+        feed = f"{self.path}.changes"
+        try:
+            st = os.stat(feed)
+        except FileNotFoundError:
+            return []
+        inode, offset = self._feed
+        if st.st_ino != inode:
+            if inode is not None:
+                logger.warning("the change feed was replaced by a snapshot rebuild; "
+                               "changes not read yet are lost, this worker must reload")
+                raise FeedReplaced()
+            offset = 0
+        readers = self._readers()
+        if readers["epoch"] != self._epoch:  # truncated, which waits until this worker read it all
+            self._epoch, offset = readers["epoch"], 0
+
+        data = b""
+        if st.st_size > offset:
+            with open(feed, "rb") as f:
+                f.seek(offset)
+                data = f.read(st.st_size - offset)
+        complete = data.rfind(b"\n") + 1  # a line still being appended waits for the next call
+        offset += complete
+        self._feed = (st.st_ino, offset)
+        self._note_offset(readers, offset)
+        if offset >= FEED_COMPACT_BYTES and offset == st.st_size:
+            self._compact(readers, offset)
+
+        fresh = []
+        for line in data[:complete].splitlines():
+            change = json.loads(line)
+            if change["pid"] != os.getpid():
+                change["expense_date"] = date.fromisoformat(change["expense_date"])
+                fresh.append(change)
+        return fresh
+
+    def _readers(self):
+        try:
+            with open(f"{self.path}.readers") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"epoch": self._epoch, "offsets": {}}
+
+    def _save_readers(self, readers):
+        tmp = f"{self.path}.readers.{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(readers, f)
+        os.replace(tmp, f"{self.path}.readers")
+
+    def _note_offset(self, readers, offset):
+        pid = str(os.getpid())
+        if readers["offsets"].get(pid) != offset:
+            readers["offsets"][pid] = offset
+            self._save_readers(readers)
+
+    def _compact(self, readers, size):
+        """Truncate the feed if every live worker has read all `size` bytes of it.  Under lock()."""
+        live = {pid: offset for pid, offset in readers["offsets"].items() if _alive(int(pid))}
+        if min(live.values()) < size:
+            return
+        with open(f"{self.path}.changes", "r+b") as f:
+            f.truncate(0)
+        self._epoch = readers["epoch"] + 1
+        self._feed = (self._feed[0], 0)
+        self._save_readers({"epoch": self._epoch, "offsets": dict.fromkeys(live, 0)})
+        logger.info(f"truncated the change feed after {len(live)} workers read its {size} bytes")
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+shared_analytics = SharedAnalytics()
@@ -0,0 +1,195 @@
+"""
+Online statistics kept up to date by the db_helper write functions.
+
+For every (category, month) cell we keep a quantile sketch, count and sum, and
+for every category an exponentially weighted moving average of its monthly
+totals.  Distribution and trend questions are answered from these summaries
+instead of scanning `expenses`.
+
+The sketch is a DDSketch-style log histogram: values fall into buckets whose
+bounds grow by a factor `gamma`, which gives quantiles within RELATIVE_ACCURACY
+of the true value.  Unlike t-digest or KLL it supports exact deletes (a bucket
+count is decremented), which we need because re-entering a day deletes its rows.
+Sketches are mergeable by adding bucket counts.
+"""
+
+import math
+import threading
+from collections import defaultdict
+
+from backend.archive import to_date
+
+
+RELATIVE_ACCURACY = 0.01
+EWMA_ALPHA = 0.3
+QUANTILES = (0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+class QuantileSketch:
+    """Mergeable log-bucket histogram with relative-error quantiles."""
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = defaultdict(int)
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+
+    def _key(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value, weight=1):
+        if value <= 0:
+            self.zero_count += weight
+        else:
+            key = self._key(value)
+            self.buckets[key] += weight
+            if self.buckets[key] == 0:
+                del self.buckets[key]
+        self.count += weight
+        self.total += value * weight
+
+    def remove(self, value):
+        self.add(value, weight=-1)
+
+    def merge(self, other):
+        for key, n in other.buckets.items():
+            self.buckets[key] += n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        return self
+
+    def quantile(self, q):
+        if self.count <= 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # midpoint of the bucket (gamma^(k-1), gamma^k] in relative terms
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class ExpenseStats:
+    """Per-category, per-month sketches and EWMA trends, safe across threads."""
+
+    def __init__(self, alpha=EWMA_ALPHA):
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._cells = {}                 # (category, 'YYYY-MM') -> QuantileSketch
+        self._categories = {}            # category -> QuantileSketch over all months
+        self._monthly = defaultdict(dict)  # category -> {'YYYY-MM': total}
+        self._trends = {}                # category -> cached trend, dropped on write
+        self._versions = defaultdict(int)  # category -> bumped on every write
+        self.loaded = False              # True once rebuild() has seen the full history
+
+    def clear(self):
+        with self._lock:
+            self._cells.clear()
+            self._categories.clear()
+            self._monthly.clear()
+            self._trends.clear()
+            self._versions.clear()
+
+    def _apply(self, expense_date, category, amount, weight):
+        month = to_date(expense_date).strftime("%Y-%m")
+        amount = float(amount)
+
+        cell = self._cells.get((category, month))
+        if cell is None:
+            cell = self._cells[(category, month)] = QuantileSketch()
+        cell.add(amount, weight)
+        self._categories.setdefault(category, QuantileSketch()).add(amount, weight)
+
+        totals = self._monthly[category]
+        totals[month] = totals.get(month, 0.0) + amount * weight
+        if cell.count <= 0:
+            del self._cells[(category, month)]
+            del totals[month]
+        self._trends.pop(category, None)
+        self._versions[category] += 1
+
+    def record(self, expense_date, category, amount):
+        with self._lock:
+            self._apply(expense_date, category, amount, 1)
+
+    def remove(self, expense_date, category, amount):
+        with self._lock:
+            self._apply(expense_date, category, amount, -1)
+
+    def rebuild(self, rows):
+        """Reset and load every expense row, e.g. from db_helper.iter_expenses()."""
+        self.loaded = False
+        self.clear()
+        n = 0
+        with self._lock:
+            for row in rows:
+                self._apply(row["expense_date"], row["category"], row["amount"], 1)
+                n += 1
+            self.loaded = True
+        return n
+
+    def distribution(self, category, month=None):
+        """Count, mean and quantiles for a category, optionally for one 'YYYY-MM'."""
+        with self._lock:
+            if month is None:
+                sketch = self._categories.get(category)
+            else:
+                sketch = self._cells.get((category, month))
+            if sketch is None or sketch.count <= 0:
+                return None
+
+            result = {
+                "category": category,
+                "month": month,
+                "count": sketch.count,
+                "total": round(sketch.total, 2),
+                "mean": round(sketch.total / sketch.count, 2),
+            }
+            for q in QUANTILES:
+                result[f"p{round(q * 100)}"] = round(sketch.quantile(q), 2)
+            return result
+
+    def monthly_totals(self):
+        """Snapshot of {category: ({'YYYY-MM': total}, version)} for downstream caches."""
+        with self._lock:
+            return {category: (dict(totals), self._versions[category])
+                    for category, totals in self._monthly.items() if totals}
+
+    def _trend(self, category):
+        totals = self._monthly[category]
+        months = sorted(totals)
+        ewma = None
+        for month in months:
+            value = totals[month]
+            ewma = value if ewma is None else self.alpha * value + (1 - self.alpha) * ewma
+        latest = totals[months[-1]]
+        return {
+            "ewma": round(ewma, 2),
+            "latest_month": months[-1],
+            "latest_total": round(latest, 2),
+            "direction": "up" if latest > ewma else "down" if latest < ewma else "flat",
+        }
+
+    def trends(self):
+        """EWMA of monthly totals per category; recomputed only for categories written to."""
+        with self._lock:
+            result = {}
+            for category, totals in self._monthly.items():
+                if not totals:
+                    continue
+                if category not in self._trends:
+                    self._trends[category] = self._trend(category)
+                result[category] = self._trends[category]
+            return result
+
+
+expense_stats = ExpenseStats()
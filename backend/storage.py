@@ -0,0 +1,285 @@
+"""
+Storage engines behind db_helper.
+
+db_helper writes its SQL once, with `%s` placeholders; an engine supplies the
+connection, translates placeholders and provides the few date expressions that
+differ between dialects.  The engine is chosen with EXPENSE_DB_ENGINE:
+
+    mysql   (default) the MySQL server configured by EXPENSE_DB_HOST/USER/PASSWORD/NAME
+    sqlite  an embedded SQLite file (EXPENSE_DB_PATH) in WAL mode, no network hop
+    memory  a private in-memory SQLite database, for tests and benchmarks
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, datetime.isoformat)
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    expense_date DATE NOT NULL,
+    amount REAL NOT NULL,
+    category VARCHAR(50),
+    notes TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_date_category ON expenses (expense_date, category);
+CREATE TABLE IF NOT EXISTS budgets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    category VARCHAR(50) NOT NULL,
+    period VARCHAR(10) NOT NULL,
+    amount REAL NOT NULL,
+    thresholds VARCHAR(100) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_budgets_category ON budgets (category);
+CREATE TABLE IF NOT EXISTS budget_alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    budget_id INTEGER NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    period VARCHAR(10) NOT NULL,
+    period_start DATE NOT NULL,
+    threshold REAL NOT NULL,
+    budget_amount REAL NOT NULL,
+    total REAL NOT NULL,
+    expense_date DATE NOT NULL,
+    created_at DATETIME NOT NULL
+);
+"""
+
+# the README's Database Setup, for databases created by code (benchmark scratch databases)
+MYSQL_SCHEMA = (
+    """CREATE TABLE expenses (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        expense_date DATE NOT NULL,
+        amount DECIMAL(10,2) NOT NULL,
+        category VARCHAR(50),
+        notes TEXT,
+        INDEX idx_expenses_date_category (expense_date, category)
+    )""",
+    """CREATE TABLE budgets (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        category VARCHAR(50) NOT NULL,
+        period VARCHAR(10) NOT NULL,
+        amount DECIMAL(10,2) NOT NULL,
+        thresholds VARCHAR(100) NOT NULL,
+        INDEX idx_budgets_category (category)
+    )""",
+    """CREATE TABLE budget_alerts (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        budget_id INT NOT NULL,
+        category VARCHAR(50) NOT NULL,
+        period VARCHAR(10) NOT NULL,
+        period_start DATE NOT NULL,
+        threshold DOUBLE NOT NULL,
+        budget_amount DECIMAL(10,2) NOT NULL,
+        total DECIMAL(10,2) NOT NULL,
+        expense_date DATE NOT NULL,
+        created_at DATETIME NOT NULL
+    )""",
+)
+
+
+class StorageEngine:
+    """Connection handling and dialect details for one kind of database."""
+
+    name = None
+    Error = Exception            # base class of the driver's errors
+    supports_partitioning = False
+    explain_prefix = "EXPLAIN "
+    total_type = float           # what SUM(amount) comes back as
+
+    # SQL expressions over expense_date
+    month_number_sql = None
+    period_sql = {}
+
+    @contextmanager
+    def cursor(self, commit=False):
+        """Yield a cursor whose rows are dicts; commit on exit if asked to."""
+        raise NotImplementedError
+
+    def translate(self, query):
+        """Rewrite a query written with `%s` placeholders for this driver."""
+        return query
+
+
+class MySQLEngine(StorageEngine):
+
+    name = "mysql"
+    supports_partitioning = True
+    total_type = Decimal
+    month_number_sql = "MONTH(expense_date)"
+    period_sql = {
+        "day": "expense_date",
+        "week": "DATE_SUB(expense_date, INTERVAL WEEKDAY(expense_date) DAY)",
+        "month": "DATE_SUB(expense_date, INTERVAL DAYOFMONTH(expense_date) - 1 DAY)",
+        "year": "MAKEDATE(YEAR(expense_date), 1)",
+    }
+
+    def __init__(self, host=None, user=None, password=None, database=None):
+        import mysql.connector
+        self._connector = mysql.connector
+        self.Error = mysql.connector.Error
+        self.config = {
+            "host": host or os.environ.get("EXPENSE_DB_HOST", "localhost"),
+            "user": user or os.environ.get("EXPENSE_DB_USER", "YOURUSER"),
+            "password": password or os.environ.get("EXPENSE_DB_PASSWORD", "YOURPASSWORD"),
+            "database": database or os.environ.get("EXPENSE_DB_NAME", "expense_manager"),
+        }
+
+    @contextmanager
+    def cursor(self, commit=False):
+        connection = self._connector.connect(**self.config)
+        cursor = connection.cursor(dictionary=True)
+        try:
+            yield cursor
+            if commit:
+                connection.commit()
+        finally:
+            cursor.close()
+            connection.close()
+
+    def _server_statements(self, statements):
+        """Run statements on a connection to the server, not to the configured database."""
+        connection = self._connector.connect(**{k: v for k, v in self.config.items() if k != "database"})
+        try:
+            cursor = connection.cursor()
+            for statement in statements:
+                cursor.execute(statement)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def create_database(self):
+        """Create the configured database with the app's tables; fails if it already exists."""
+        name = self.config["database"]
+        if not name.replace("_", "").isalnum():
+            raise ValueError(f"{name!r} is not a plain database name")
+        self._server_statements([f"CREATE DATABASE `{name}`", f"USE `{name}`", *MYSQL_SCHEMA])
+
+    def drop_database(self):
+        self._server_statements([f"DROP DATABASE IF EXISTS `{self.config['database']}`"])
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteEngine(StorageEngine):
+    """
+    Embedded SQLite.  Each thread keeps its own connection; the driver caches
+    prepared statements per connection, so repeated queries skip the parser.
+    """
+
+    name = "sqlite"
+    Error = sqlite3.Error
+    explain_prefix = "EXPLAIN QUERY PLAN "
+    month_number_sql = "CAST(strftime('%m', expense_date) AS INTEGER)"
+    period_sql = {
+        "day": "expense_date",
+        "week": "date(expense_date, '-' || ((CAST(strftime('%w', expense_date) AS INTEGER) + 6) % 7) || ' days')",
+        "month": "date(expense_date, 'start of month')",
+        "year": "date(expense_date, 'start of year')",
+    }
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("EXPENSE_DB_PATH", "expense_manager.db")
+        self._local = threading.local()
+        with self.cursor(commit=True) as cursor:
+            cursor.connection.executescript(SQLITE_SCHEMA)
+
+    def _connect(self):
+        # streamed reads may be resumed on another worker thread than the one that started them
+        connection = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES,
+                                     cached_statements=256, check_same_thread=False)
+        connection.row_factory = _dict_row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    @contextmanager
+    def cursor(self, commit=False):
+        connection = self._connection()
+        cursor = _TranslatingCursor(connection.cursor(), self)
+        try:
+            yield cursor
+            if commit:
+                connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def translate(self, query):
+        return query.replace("%s", "?")
+
+
+class MemoryEngine(SQLiteEngine):
+    """
+    A private in-memory SQLite database: nothing touches the disk and the data
+    disappears with the process.  One connection is shared by all threads.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()  # not an RLock: a streamed read may finish on another thread
+        self._shared = None
+        super().__init__(":memory:")
+
+    def _connect(self):
+        connection = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES,
+                                     cached_statements=256, check_same_thread=False)
+        connection.row_factory = _dict_row
+        return connection
+
+    def _connection(self):
+        if self._shared is None:
+            self._shared = self._connect()
+        return self._shared
+
+    @contextmanager
+    def cursor(self, commit=False):
+        with self._lock:
+            with super().cursor(commit) as cursor:
+                yield cursor
+
+
+class _TranslatingCursor:
+    """Wraps a DB-API cursor so queries written for `%s` run on `?` drivers."""
+
+    def __init__(self, cursor, engine):
+        self._cursor = cursor
+        self._engine = engine
+
+    def execute(self, query, params=()):
+        return self._cursor.execute(self._engine.translate(query), params)
+
+    def executemany(self, query, seq_of_params):
+        return self._cursor.executemany(self._engine.translate(query), seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+ENGINES = {"mysql": MySQLEngine, "sqlite": SQLiteEngine, "memory": MemoryEngine}
+
+
+def create_engine(name=None):
+    name = name or os.environ.get("EXPENSE_DB_ENGINE", "mysql")
+    if name not in ENGINES:
+        raise ValueError(f"Unknown EXPENSE_DB_ENGINE {name!r}, expected one of {sorted(ENGINES)}")
+    return ENGINES[name]()
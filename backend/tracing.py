@@ -0,0 +1,247 @@
+"""
+Lightweight span tracing.
+
+A request gets a request id (the client's X-Request-ID header, or a fresh one)
+and every span recorded while serving it -- the HTTP request, the handler,
+each db_helper call and each connect/execute/fetch on the cursor -- shares the
+trace id derived from it.  Time spent after the handler span closes but
+before the HTTP span does is response serialization.
+
+Finished spans are exported in the background to
+
+    EXPENSE_TRACE_FILE       JSON lines, one span per line
+    EXPENSE_OTLP_ENDPOINT    an OTLP/HTTP collector, e.g. http://localhost:4318
+
+and with neither set, spans are not recorded at all.
+"""
+
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+
+from backend.loggin_setup import setup_logger
+
+
+logger = setup_logger("tracing")
+
+TRACE_FILE = os.environ.get("EXPENSE_TRACE_FILE")
+OTLP_ENDPOINT = os.environ.get("EXPENSE_OTLP_ENDPOINT")
+SERVICE_NAME = os.environ.get("EXPENSE_SERVICE_NAME", "expense-backend")
+REQUEST_ID_HEADER = "x-request-id"
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def request_id():
+    return _request_id.get()
+
+
+def _trace_id_for(request_id):
+    """32 hex chars: the request id itself if it already has that shape."""
+    if len(request_id) == 32 and all(c in "0123456789abcdef" for c in request_id):
+        return request_id
+    return hashlib.md5(request_id.encode()).hexdigest()
+
+
+class Span:
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start_ns", "end_ns", "_t0")
+
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter_ns()
+        self.end_ns = None
+
+    def finish(self):
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._t0)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "request_id": self.attributes.get("request.id"),
+            "start_unix_nano": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+        }
+
+
+class _Exporter:
+    """Batches finished spans on a daemon thread so requests never wait on I/O."""
+
+    def __init__(self, trace_file, otlp_endpoint):
+        self.trace_file = trace_file
+        self.otlp_endpoint = otlp_endpoint.rstrip("/") + "/v1/traces" if otlp_endpoint else None
+        self.enabled = bool(trace_file or otlp_endpoint)
+        self._queue = queue.Queue(maxsize=10000)
+        if self.enabled:
+            threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+
+    def export(self, span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # never block a request on tracing
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            time.sleep(0.5)
+            while not self._queue.empty() and len(batch) < 1000:
+                batch.append(self._queue.get_nowait())
+            try:
+                if self.trace_file:
+                    with open(self.trace_file, "a") as f:
+                        f.writelines(json.dumps(s.to_dict(), default=str) + "\n" for s in batch)
+                if self.otlp_endpoint:
+                    self._post_otlp(batch)
+            except Exception as e:  # a broken collector must not kill the exporter
+                logger.error(f"span export failed: {e}")
+
+    def _post_otlp(self, batch):
+        def value(v):
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            return {"stringValue": str(v)}
+
+        spans = [{
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+            "name": s.name,
+            "kind": 2 if s.parent_id is None else 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [{"key": k, "value": value(v)} for k, v in s.attributes.items()],
+        } for s in batch]
+        body = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "backend.tracing"}, "spans": spans}],
+        }]}
+        request = urllib.request.Request(self.otlp_endpoint, data=json.dumps(body).encode(),
+                                         headers={"Content-Type": "application/json"})
+        urllib.request.urlopen(request, timeout=5).close()
+
+
+exporter = _Exporter(TRACE_FILE, OTLP_ENDPOINT)
+
+
+@contextmanager
+def span(name, activate=True, **attributes):
+    """
+    Record a span around the block, as a child of the current one.
+
+    With activate=False the span does not become the parent of spans opened
+    inside the block; generators need this because they may be resumed in a
+    different context than the one they started in.
+    """
+    if not exporter.enabled:
+        yield None
+        return
+
+    parent = _current_span.get()
+    rid = _request_id.get()
+    if parent is not None:
+        trace_id = parent.trace_id
+    else:
+        trace_id = _trace_id_for(rid) if rid else uuid.uuid4().hex
+    if rid:
+        attributes["request.id"] = rid
+
+    current = Span(name, trace_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current) if activate else None
+    try:
+        yield current
+    except BaseException as e:
+        attributes["error"] = type(e).__name__
+        raise
+    finally:
+        if token is not None:
+            _current_span.reset(token)
+        current.finish()
+        exporter.export(current)
+
+
+def traced(name=None):
+    """
+    Decorator: run the function (or whole generator / coroutine) inside a span
+    named `module.function` unless a name is given.
+    """
+    def decorate(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                with span(span_name, activate=False):
+                    yield from fn(*args, **kwargs)
+            return generator_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: adopt or mint the request id, echo it back in the
+    response and wrap the whole request, streaming bodies included, in a span.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        rid = headers.get(REQUEST_ID_HEADER.encode(), b"").decode("latin-1")[:128] or uuid.uuid4().hex
+        _request_id.set(rid)
+        status = {}
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) +
+                           [(REQUEST_ID_HEADER.encode(), rid.encode("latin-1"))]}
+            await send(message)
+
+        with span(f"{scope['method']} {scope['path']}", **{"http.method": scope["method"],
+                                                          "http.target": scope["path"]}) as root:
+            await self.app(scope, receive, send_with_request_id)
+            if root is not None:
+                root.attributes["http.status_code"] = status.get("code")
@@ -0,0 +1,235 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks run --rows 100000 --output bench.json
+    python -m benchmarks run --rows 10000000 --engine sqlite --db-path /tmp/bench.db --skip-load
+    python -m benchmarks run --engine mysql --db-name expense_bench      # scratch MySQL database
+    python -m benchmarks run --url http://localhost:8000 --skip-micro   # against a live server (reads only)
+    python -m benchmarks compare baseline.json bench.json --threshold 0.2
+    python -m benchmarks startup --budget-ms 1500                        # cold start of backend.server
+    python -m benchmarks startup --module app --path frontend
+
+`run` generates a deterministic history (same --rows/--seed -> same data),
+loads it into a fresh database, times every db_helper function and sweeps
+every API route over the given concurrency levels.  With MySQL the fresh
+database is --db-name, created for the run and dropped after it; the app's own
+database is never used; neither is the app's SQLite file.  Against a live
+server (--url) only read routes are load-tested unless --allow-writes is given.  Results are JSON with the
+git commit attached, so two runs can be compared; `compare` exits non-zero
+when a latency grew by more than the threshold.  `startup` profiles the
+import time of a module in fresh interpreters and exits non-zero when the
+median exceeds --budget-ms.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmarks import datagen
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=ROOT).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _check_db_name(args):
+    """MySQL runs write millions of rows: only into a scratch database, never the app's."""
+    app_database = os.environ.get("EXPENSE_DB_NAME", "expense_manager")
+    if args.engine == "mysql" and not args.url and args.db_name in (None, app_database):
+        raise SystemExit(f"--engine mysql needs --db-name naming a scratch database other than "
+                         f"the app's ({app_database!r}); the run creates it and drops it afterwards")
+
+
+def _check_db_path(args):
+    """The sqlite file is deleted before every run: never let that be the app's."""
+    app_path = os.environ.get("EXPENSE_DB_PATH", "expense_manager.db")
+    if args.engine == "sqlite" and not args.url and os.path.realpath(args.db_path) == os.path.realpath(app_path):
+        raise SystemExit(f"--db-path {args.db_path!r} is the app's database (EXPENSE_DB_PATH); "
+                         f"the run deletes and recreates it, pick another file")
+
+
+def _prepare(args):
+    """Fresh engine with the generated history, installed in db_helper."""
+    from backend import db_helper, storage
+
+    if args.engine == "sqlite":
+        if os.path.exists(args.db_path):
+            os.remove(args.db_path)
+        engine = storage.SQLiteEngine(args.db_path)
+    elif args.engine == "mysql":
+        engine = storage.MySQLEngine(database=args.db_name)
+        engine.create_database()
+    else:
+        engine = storage.create_engine(args.engine)
+    db_helper.use_engine(engine)
+
+    started = time.perf_counter()
+    rows = datagen.generate(args.rows, seed=args.seed, start=args.start, years=args.years, skew=args.skew)
+    loaded = datagen.load(engine, rows)
+    print(f"loaded {loaded} rows into {engine.name} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return engine
+
+
+async def _load_in_process(args, start, end):
+    from backend import server
+    from benchmarks import loadtest
+
+    async with server.lifespan(server.app):
+        await asyncio.to_thread(server.startup_done.wait)  # statistics, search index
+        return await loadtest.run(start, end, args.concurrency, args.requests, app=server.app)
+
+
+def run(args):
+    from benchmarks import loadtest, micro
+
+    start = args.start
+    end = date(start.year + args.years, start.month, start.day) - timedelta(days=1)
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "engine": "remote" if args.url else args.engine,
+            "rows": args.rows,
+            "seed": args.seed,
+            "years": args.years,
+            "skew": args.skew,
+            "concurrency": args.concurrency,
+            "requests_per_level": args.requests,
+        },
+    }
+
+    _check_db_name(args)
+    _check_db_path(args)
+    engine = None if args.url else _prepare(args)
+    try:
+        if not args.skip_micro and not args.url:
+            report["micro"] = micro.run(start, end, repeat=args.repeat)
+        if not args.skip_load:
+            if args.url:
+                report["load"] = asyncio.run(loadtest.run(start, end, args.concurrency, args.requests,
+                                                          base_url=args.url, writes=args.allow_writes))
+            else:
+                from backend import server
+                report["load"] = asyncio.run(_load_in_process(args, start, end))
+                report["meta"]["routes_not_covered"] = loadtest.uncovered_routes(server.app, start, end)
+    finally:
+        if engine is not None and engine.name == "mysql":
+            engine.drop_database()
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+def compare(args):
+    """Print every latency that regressed by more than the threshold; exit 1 if any."""
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    pairs = []
+    for name, stats in candidate.get("micro", {}).items():
+        if name in baseline.get("micro", {}):
+            pairs.append((f"micro {name} {args.metric}", baseline["micro"][name][args.metric], stats[args.metric]))
+    for name, levels in candidate.get("load", {}).items():
+        old_levels = {level["concurrency"]: level for level in baseline.get("load", {}).get(name, [])}
+        for level in levels:
+            old = old_levels.get(level["concurrency"])
+            if old:
+                pairs.append((f"load {name} c={level['concurrency']} {args.metric}",
+                              old[args.metric], level[args.metric]))
+
+    regressions = 0
+    for label, old, new in pairs:
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{label:70s} {old:10.3f} -> {new:10.3f} ms ({change:+.0%}){flag}")
+
+    print(f"{regressions} regression(s) over {args.threshold:.0%} in {len(pairs)} comparisons")
+    return 1 if regressions else 0
+
+
+def startup(args):
+    """Print the import profile; exit 1 if the median cold start is over budget."""
+    from benchmarks import startup as startup_profile
+
+    report = startup_profile.profile(args.module, args.path, repeat=args.repeat, top=args.top)
+    print(json.dumps(report, indent=2))
+    if args.budget_ms is not None and report["median_ms"] > args.budget_ms:
+        print(f"{args.module} cold start {report['median_ms']:.0f} ms exceeds the {args.budget_ms:.0f} ms budget",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = sub.add_parser("run", help="generate data and run the benchmarks")
+    run_cmd.add_argument("--rows", type=int, default=100_000)
+    run_cmd.add_argument("--seed", type=int, default=42)
+    run_cmd.add_argument("--start", type=date.fromisoformat, default=date(2021, 1, 1))
+    run_cmd.add_argument("--years", type=int, default=3)
+    run_cmd.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of category popularity")
+    run_cmd.add_argument("--engine", choices=("memory", "sqlite", "mysql"), default="memory")
+    run_cmd.add_argument("--db-path", default="bench.db", help="sqlite file, recreated on every run")
+    run_cmd.add_argument("--db-name", help="mysql: scratch database created for the run and dropped after it; "
+                                           "must not be the app's EXPENSE_DB_NAME")
+    run_cmd.add_argument("--repeat", type=int, default=20, help="timed calls per db_helper function")
+    run_cmd.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    run_cmd.add_argument("--requests", type=int, default=200, help="requests per route and concurrency level")
+    run_cmd.add_argument("--url", help="load-test this running server instead of the in-process app")
+    run_cmd.add_argument("--allow-writes", action="store_true",
+                         help="with --url: also load-test POST /expenses, on a day far beyond any real history")
+    run_cmd.add_argument("--skip-micro", action="store_true")
+    run_cmd.add_argument("--skip-load", action="store_true")
+    run_cmd.add_argument("--output", help="also write the JSON report here")
+
+    compare_cmd = sub.add_parser("compare", help="diff two JSON reports")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("candidate")
+    compare_cmd.add_argument("--metric", default="p95_ms", choices=("p50_ms", "p95_ms", "p99_ms", "mean_ms"))
+    compare_cmd.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown")
+
+    startup_cmd = sub.add_parser("startup", help="profile import (cold start) time")
+    startup_cmd.add_argument("--module", default="backend.server")
+    startup_cmd.add_argument("--path", action="append", default=[],
+                             help="prepend to sys.path, e.g. frontend for its flat modules")
+    startup_cmd.add_argument("--repeat", type=int, default=5, help="fresh interpreters timed")
+    startup_cmd.add_argument("--top", type=int, default=20, help="slowest imports listed")
+    startup_cmd.add_argument("--budget-ms", type=float, help="exit 1 when the median is over this")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args)
+        return 0
+    if args.command == "startup":
+        return startup(args)
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
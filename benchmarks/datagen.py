@@ -0,0 +1,102 @@
+"""
+Deterministic synthetic expense histories.
+
+The same (rows, seed, start, years, skew) always produce the same rows, so
+benchmark results from different commits are measured on identical data.
+
+  * categories follow a Zipf-like popularity (`skew`), each with its own
+    typical amount;
+  * spend is seasonal: December and the summer months are busier;
+  * weekends see more small purchases.
+"""
+
+import math
+import random
+from datetime import date, timedelta
+
+
+CATEGORIES = [
+    # (name, median amount, spread)
+    ("Food", 18.0, 0.6),
+    ("Shopping", 45.0, 0.9),
+    ("Entertainment", 30.0, 0.8),
+    ("Other", 25.0, 1.0),
+    ("Utilities", 90.0, 0.3),
+    ("Rent", 1400.0, 0.05),
+]
+
+NOTE_WORDS = {
+    "Food": ["samosa", "chai", "groceries", "pizza", "dosa", "lunch", "dinner", "coffee"],
+    "Shopping": ["potatoes", "shoes", "shirt", "amazon", "books", "headphones"],
+    "Entertainment": ["movie", "concert", "netflix", "bowling", "museum"],
+    "Other": ["uber", "gift", "haircut", "parking", "laundry"],
+    "Utilities": ["electricity", "water", "internet", "phone"],
+    "Rent": ["rent", "apartment"],
+}
+
+# relative spend per calendar month, January first
+SEASONALITY = [0.85, 0.8, 0.9, 0.95, 1.0, 1.1, 1.2, 1.15, 0.95, 1.0, 1.1, 1.4]
+
+
+def category_weights(skew):
+    """Zipf weights: the k-th category is 1/k^skew as popular as the first."""
+    return [1 / (k ** skew) for k in range(1, len(CATEGORIES) + 1)]
+
+
+def generate(rows, seed=42, start=date(2021, 1, 1), years=3, skew=1.1):
+    """Yield `rows` expense dicts spread over `years` years from `start`."""
+    rng = random.Random(seed)
+    days = (date(start.year + years, start.month, start.day) - start).days
+    weights = category_weights(skew)
+
+    # spread rows over the days in proportion to season and weekday; carrying the
+    # fractional part forward keeps the total exact without holding a row list
+    day_weights = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        day_weights.append(SEASONALITY[day.month - 1] * (1.3 if day.weekday() >= 5 else 1.0))
+    total = sum(day_weights)
+
+    expense_id, carry = 0, 0.0
+    for offset, w in enumerate(day_weights):
+        carry += rows * w / total
+        count = int(carry) if offset < days - 1 else rows - expense_id
+        carry -= count
+        for _ in range(count):
+            expense_id += 1
+            yield _expense(rng, weights, expense_id, start + timedelta(days=offset))
+
+
+def _expense(rng, weights, expense_id, day):
+    name, median, spread = rng.choices(CATEGORIES, weights=weights)[0]
+    amount = round(median * math.exp(rng.gauss(0, spread)), 2)
+    words = rng.sample(NOTE_WORDS[name], k=2)
+    return {
+        "id": expense_id,
+        "expense_date": day,
+        "amount": max(amount, 0.01),
+        "category": name,
+        "notes": " ".join(words),
+    }
+
+
+def load(engine, rows, batch_size=50000):
+    """Bulk insert generated rows straight into the engine (no db_helper side effects)."""
+    batch, n = [], 0
+    for row in rows:
+        batch.append((row["expense_date"], row["amount"], row["category"], row["notes"]))
+        if len(batch) == batch_size:
+            n += _insert(engine, batch)
+            batch = []
+    if batch:
+        n += _insert(engine, batch)
+    return n
+
+
+def _insert(engine, batch):
+    with engine.cursor(commit=True) as cursor:
+        cursor.executemany(
+            "INSERT INTO expenses (expense_date, amount, category, notes) VALUES (%s, %s, %s, %s)",
+            batch
+        )
+    return len(batch)
@@ -0,0 +1,115 @@
+"""
+Load-test harness for the FastAPI routes.
+
+By default the app is driven in-process through httpx's ASGI transport (no
+sockets, so numbers measure the app, not the network); pass a base URL to
+drive a running server instead.  Every scenario is swept over a list of
+concurrency levels and reports throughput and latency percentiles.
+
+The one write scenario re-enters WRITE_DAY, far beyond any real history, runs
+last and empties the day again afterwards.  Against a running server it is
+skipped unless writes are explicitly allowed.
+"""
+
+import asyncio
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from benchmarks.micro import percentiles
+
+
+ARROW = {"Accept": "application/vnd.apache.arrow.stream"}
+
+# no real expense is dated here, and its week, month and year all end before date.max
+WRITE_DAY = date(9998, 12, 31)
+
+# routes that are deliberately not load-tested, with the reason
+SKIPPED = {
+    ("GET", "/events/analytics"): "long-lived SSE stream",
+    ("POST", "/archive/{year}"): "destructive admin operation",
+    ("POST", "/budgets"): "configuration, not a hot path",
+    ("DELETE", "/budgets/{budget_id}"): "configuration, not a hot path",
+}
+
+
+def scenarios(start, end, writes=True):
+    """(name, method, route template, concrete path, request kwargs) per route and variant."""
+    month_end = start + timedelta(days=27)
+    dates = {"start_date": str(start), "end_date": str(month_end)}
+    reads = [
+        ("get_expenses", "GET", "/expenses/{expense_date}", f"/expenses/{start}", {}),
+        ("expenses_range.json", "GET", "/expenses", "/expenses", {"params": dates}),
+        ("expenses_range.arrow", "GET", "/expenses", "/expenses", {"params": dates, "headers": ARROW}),
+        ("analytics.json", "POST", "/analytics", "/analytics", {"json": dates}),
+        ("analytics.arrow", "POST", "/analytics", "/analytics", {"json": dates, "headers": ARROW}),
+        ("analytics_monthly", "GET", "/analytics/monthly", "/analytics/monthly", {}),
+        ("analytics_rollup", "GET", "/analytics/rollup", "/analytics/rollup",
+         {"params": {"start_date": str(start), "end_date": str(end), "granularity": "month"}}),
+        ("analytics_distribution", "GET", "/analytics/distribution", "/analytics/distribution",
+         {"params": {"category": "Food"}}),
+        ("analytics_trends", "GET", "/analytics/trends", "/analytics/trends", {}),
+        ("forecast", "GET", "/forecast", "/forecast", {"params": {"periods": 3}}),
+        ("search", "GET", "/search", "/search", {"params": {"q": "sam"}}),
+        ("budgets", "GET", "/budgets", "/budgets", {}),
+        ("alerts", "GET", "/alerts", "/alerts", {"params": {"limit": 50}}),
+        ("savings_plan", "POST", "/savings_plan", "/savings_plan",
+         {"json": {"target": 500, "period": "month", "start_date": str(start), "end_date": str(end)}}),
+    ]
+    if not writes:
+        return reads
+    return reads + [
+        ("add_or_update_expense", "POST", "/expenses/{expense_date}", f"/expenses/{WRITE_DAY}",
+         {"json": [{"amount": 12.5, "category": "Food", "notes": "load test samosa"}]}),
+    ]
+
+
+def uncovered_routes(app, start, end):
+    """API routes that have neither a scenario nor a SKIPPED reason."""
+    covered = {(method, route) for _, method, route, _, _ in scenarios(start, end)}
+    missing = []
+    for route in app.routes:
+        for method in getattr(route, "methods", None) or ():
+            if method in ("HEAD", "OPTIONS") or route.path in ("/openapi.json", "/docs", "/redoc",
+                                                                "/docs/oauth2-redirect"):
+                continue
+            if (method, route.path) not in covered and (method, route.path) not in SKIPPED:
+                missing.append(f"{method} {route.path}")
+    return missing
+
+
+async def _level(client, method, path, kwargs, concurrency, requests):
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            await response.aread()
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"concurrency": concurrency, "throughput_rps": round(requests / elapsed, 1),
+            "errors": errors, **percentiles(latencies)}
+
+
+async def run(start, end, concurrency=(1, 4, 16), requests=200, base_url=None, app=None, writes=True):
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, timeout=60)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    results = {}
+    async with client:
+        for name, method, _, path, kwargs in scenarios(start, end, writes):
+            results[name] = [await _level(client, method, path, kwargs, c, requests) for c in concurrency]
+        if writes:
+            await client.post(f"/expenses/{WRITE_DAY}", json=[])  # leave no load test rows behind
+    return results
@@ -0,0 +1,95 @@
+"""
+Micro-benchmarks for every public db_helper function.
+
+Each case is timed `repeat` times after one warm-up call; the report carries
+the raw percentiles so runs from different commits can be diffed.
+"""
+
+import json
+import time
+from datetime import date, datetime
+
+from backend import db_helper
+from benchmarks.datagen import CATEGORIES
+
+
+def percentiles(samples_ms):
+    """min, mean and nearest-rank p50/p95/p99 of a list of milliseconds."""
+    ordered = sorted(samples_ms)
+
+    def rank(q):
+        return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+    return {
+        "n": len(ordered),
+        "min_ms": round(ordered[0], 3),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": round(rank(0.50), 3),
+        "p95_ms": round(rank(0.95), 3),
+        "p99_ms": round(rank(0.99), 3),
+    }
+
+
+def _time(fn, repeat):
+    fn()  # warm caches and statement preparation
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def cases(start, end):
+    """(name, callable) for each db_helper function, over the generated range."""
+    month_end = date(start.year, start.month, 28)
+    writes_day = date(end.year + 1, 1, 1)  # outside the generated history
+
+    def write_day():
+        db_helper.delete_expense_for_date(writes_day)
+        for i in range(5):
+            db_helper.insert_expense(writes_day, 10.0 + i, "Food", "benchmark samosa")
+
+    budget_ids = []
+
+    def fetch_budgets():
+        if not budget_ids:  # one monthly budget per category, created by the warm-up call
+            budget_ids.extend(db_helper.insert_budget(name, "month", 500.0, json.dumps([0.8, 1.0]))
+                              for name, _, _ in CATEGORIES)
+        return db_helper.fetch_budgets(["Food", "Rent"])
+
+    def budget_lifecycle():
+        db_helper.delete_budget(db_helper.insert_budget("Food", "week", 100.0, json.dumps([1.0])))
+
+    def insert_alerts():
+        db_helper.insert_budget_alerts([{
+            "budget_id": 0, "category": "Food", "period": "month", "period_start": writes_day,
+            "threshold": 0.8, "budget_amount": 500.0, "total": 400.0, "expense_date": writes_day,
+            "created_at": datetime(writes_day.year, 1, 1),
+        } for _ in range(3)])
+
+    return [
+        ("fetch_expenses_for_date", lambda: db_helper.fetch_expenses_for_date(start)),
+        ("fetch_expense_summary.month", lambda: db_helper.fetch_expense_summary(start, month_end)),
+        ("fetch_expense_summary.full", lambda: db_helper.fetch_expense_summary(start, end)),
+        ("fetch_monthly_expense_summary", db_helper.fetch_monthly_expense_summary),
+        ("fetch_rollup.week_by_category", lambda: db_helper.fetch_rollup(start, end, "week")),
+        ("fetch_rollup.month_total", lambda: db_helper.fetch_rollup(start, end, "month", False)),
+        ("iter_expense_batches.month", lambda: sum(len(b) for b in db_helper.iter_expense_batches(start, month_end))),
+        ("fetch_expense_watermark", db_helper.fetch_expense_watermark),
+        ("delete_and_insert_day", write_day),
+        ("fetch_category_total.month", lambda: db_helper.fetch_category_total("Food", start, month_end)),
+        ("fetch_budgets", fetch_budgets),
+        ("insert_and_delete_budget", budget_lifecycle),
+        ("insert_budget_alerts", insert_alerts),
+        ("fetch_budget_alerts", db_helper.fetch_budget_alerts),
+    ]
+
+
+def run(start, end, repeat=20, only=None):
+    results = {}
+    for name, fn in cases(start, end):
+        if only and not any(name.startswith(o) for o in only):
+            continue
+        results[name] = _time(fn, repeat)
+    return results
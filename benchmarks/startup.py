@@ -0,0 +1,67 @@
+"""
+Cold-start profile: how long importing a module takes, and which imports cost.
+
+Every measurement runs in a fresh interpreter so nothing is already cached in
+sys.modules.  Wall time is the median of several plain imports; the per-module
+breakdown comes from one extra run under `python -X importtime`.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+
+_TIMED_IMPORT = (
+    "import importlib, sys, time\n"
+    "sys.path[:0] = sys.argv[2:]\n"
+    "start = time.perf_counter()\n"
+    "importlib.import_module(sys.argv[1])\n"
+    "print((time.perf_counter() - start) * 1000)\n"
+)
+
+
+def _python(args):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, cwd=root, check=False)
+
+
+def parse_importtime(stderr):
+    """[(module, self_ms, cumulative_ms)] from `-X importtime` output, in import order."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return rows
+
+
+def wall_times(module, paths=(), repeat=5):
+    """Milliseconds to import `module` in each of `repeat` fresh interpreters."""
+    times = []
+    for _ in range(repeat):
+        result = _python(["-c", _TIMED_IMPORT, module, *paths])
+        if result.returncode != 0:
+            raise RuntimeError(f"importing {module} failed:\n{result.stderr}")
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return times
+
+
+def profile(module, paths=(), repeat=5, top=20):
+    """Median wall time plus the slowest imports by cumulative and by self time."""
+    times = wall_times(module, paths, repeat)
+    traced = _python(["-X", "importtime", "-c", _TIMED_IMPORT, module, *paths])
+    rows = parse_importtime(traced.stderr)
+
+    def entry(row):
+        return {"module": row[0], "self_ms": round(row[1], 2), "cumulative_ms": round(row[2], 2)}
+
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(times), 1),
+        "runs_ms": [round(t, 1) for t in times],
+        "modules_imported": len(rows),
+        "slowest_cumulative": [entry(r) for r in sorted(rows, key=lambda r: -r[2])[:top]],
+        "slowest_self": [entry(r) for r in sorted(rows, key=lambda r: -r[1])[:top]],
+    }
@@ -1,6 +1,6 @@
 import streamlit as st
 from datetime import datetime
-import requests
+from api_session import session
 
 
 API_URL = "http://localhost:8000"
@@ -9,7 +9,7 @@ API_URL = "http://localhost:8000"
 
 def add_update_tab():
     selected_date = st.date_input("Enter the date", datetime(2024, 8, 1), label_visibility="collapsed")
-    response = requests.get(f"{API_URL}/expenses/{selected_date}")
+    response = session.get(f"{API_URL}/expenses/{selected_date}")
     if response.status_code == 200:
         existing_expenses = response.json()
             # st.write(existing_expenses)
@@ -65,8 +65,12 @@ def add_update_tab():
         if submit_button():
             filtered_expenses = [expense for expense in expenses if expense['amount']> 0]
 
-            requests.post(f"{API_URL}/expenses/{selected_date}", json=filtered_expenses)
+            response = session.post(f"{API_URL}/expenses/{selected_date}", json=filtered_expenses)
             if response.status_code == 200:
                 st.success("Expenses updated successfully!")
+                alerts = response.json().get("alerts", [])
+                if alerts:
+                    from budgets import show_alerts
+                    show_alerts(alerts)
             else:
                 st.error("Failed to update expenses.")
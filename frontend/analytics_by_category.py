@@ -1,7 +1,7 @@
 import streamlit as st
 from datetime import datetime
-import requests
-import pandas as pd
+from arrow_client import fetch_frame
+from live_updates import DeltaListener, apply_deltas, stop_listener
 
 API_URL = "http://localhost:8000"
 
@@ -12,29 +12,75 @@ def analytics_by_category_tab():
     with col2:
         end_date = st.date_input("End Date", datetime(2024, 8, 5))
 
-    if st.button("Get Analytics"):
-        payload = {
-            "start_date": start_date.strftime("%Y-%m-%d"),
-            "end_date": end_date.strftime("%Y-%m-%d"),
-        }
+    live = st.toggle("Live updates", key="category_live",
+                     help="Apply new expenses as they are saved instead of re-running the query")
 
+    if st.button("Get Analytics") and not _fetch_breakdown(start_date, end_date):
+        return
 
-        response = requests.post(f"{API_URL}/analytics/", json=payload)
-        response = response.json()
+    if "category_df" not in st.session_state:
+        return
 
-        data = {
-            "Category": list(response.keys()),
-            "Total": [response[category]["total"] for category in response],
-            "Percentage": [response[category]["percentage"] for category in response]
-        }
+    if live:
+        _live_breakdown()
+    else:
+        stop_listener(st.session_state, "category_listener")
+        _render_breakdown(st.session_state["category_df"])
 
-        df = pd.DataFrame(data)
-        df_sorted = df.sort_values(by="Percentage", ascending=False)
 
-        st.title("Expense Breakdown by Category")
-        st.bar_chart(data=df_sorted.set_index("Category")["Percentage"], width=0, height=0, use_container_width=True)
+def _fetch_breakdown(start_date, end_date):
+    payload = {
+        "start_date": start_date.strftime("%Y-%m-%d"),
+        "end_date": end_date.strftime("%Y-%m-%d"),
+    }
 
-        df_sorted["Total"] = df_sorted["Total"].map("{:.2f}".format)
-        df_sorted["Percentage"] = df_sorted["Percentage"].map("{:.2f}".format)
+    response, df = fetch_frame("POST", f"{API_URL}/analytics", json=payload)
+    if df is None:
+        st.error("Failed to retrieve analytics.")
+        return False
 
-        st.table(df_sorted)
\ No newline at end of file
+    df = df.rename(columns={"category": "Category", "total": "Total"})
+    st.session_state["category_df"] = df[["Category", "Total"]]
+    st.session_state["category_range"] = (start_date, end_date)
+    if "category_listener" in st.session_state:
+        st.session_state["category_listener"].reset()  # the fresh frame already includes them
+    return True
+
+
+@st.fragment(run_every=2)
+def _live_breakdown():
+    if "category_listener" not in st.session_state:
+        st.session_state["category_listener"] = DeltaListener(f"{API_URL}/events/analytics").start()
+        # writes made while live updates were off are not in the held frame
+        _fetch_breakdown(*st.session_state["category_range"])
+    listener = st.session_state["category_listener"]
+
+    messages = listener.drain()
+    if messages:
+        start_date, end_date = st.session_state["category_range"]
+        st.session_state["category_df"] = apply_deltas(
+            st.session_state["category_df"], messages, "Category", "Total",
+            lambda day, category: category, start_date, end_date,
+        )
+    if listener.missed:
+        st.warning("Some live updates were missed, click Get Analytics to refresh.")
+
+    _render_breakdown(st.session_state["category_df"])
+
+
+def _render_breakdown(df):
+    if df.empty:
+        st.info("No expenses in that range.")
+        return
+
+    total = df["Total"].sum()
+    df = df.assign(Percentage=df["Total"] / total * 100 if total else 0.0)
+    df_sorted = df.sort_values(by="Percentage", ascending=False)
+
+    st.title("Expense Breakdown by Category")
+    st.bar_chart(data=df_sorted.set_index("Category")["Percentage"], width=0, height=0, use_container_width=True)
+
+    df_sorted["Total"] = df_sorted["Total"].map("{:.2f}".format)
+    df_sorted["Percentage"] = df_sorted["Percentage"].map("{:.2f}".format)
+
+    st.table(df_sorted)
@@ -1,26 +1,61 @@
+import calendar
 import streamlit as st
-import requests
-import pandas as pd
+from arrow_client import fetch_frame
+from live_updates import DeltaListener, apply_deltas, stop_listener
 
 API_URL = "http://localhost:8000"
 
 def analytics_by_month_tab():
     st.title("Monthly Expense Breakdown")
 
-    # --- 1. Call the API ----------------------------------------------------
-    resp = requests.get(f"{API_URL}/analytics/monthly")
-    if resp.status_code != 200:
-        st.error("Could not load monthly analytics.")
-        return
+    live = st.toggle("Live updates", key="monthly_live",
+                     help="Apply new expenses as they are saved instead of re-running the query")
+
+    if not live:
+        stop_listener(st.session_state, "monthly_listener")
+
+    # --- 1. Call the API (once per live session) ----------------------------
+    if not live or "monthly_listener" not in st.session_state:
+        if live:  # switched on: a new stream and a fresh frame to apply it to
+            st.session_state["monthly_listener"] = DeltaListener(f"{API_URL}/events/analytics").start()
+        resp, df = fetch_frame("GET", f"{API_URL}/analytics/monthly")
+        if df is None:
+            st.error("Could not load monthly analytics.")
+            return
+        st.session_state["monthly_df"] = df    # columns: month_name, total
+        if "monthly_listener" in st.session_state:
+            st.session_state["monthly_listener"].reset()  # the fresh frame already includes them
+
+    if live:
+        _live_months()
+    else:
+        _render_months(st.session_state["monthly_df"])
+
+
+@st.fragment(run_every=2)
+def _live_months():
+    listener = st.session_state["monthly_listener"]
+
+    messages = listener.drain()
+    if messages:
+        st.session_state["monthly_df"] = apply_deltas(
+            st.session_state["monthly_df"], messages, "month_name", "total",
+            lambda day, category: calendar.month_name[int(day[5:7])],
+        )
+    if listener.missed:
+        st.warning("Some live updates were missed, switch Live updates off and on to refresh.")
+
+    _render_months(st.session_state["monthly_df"])
+
 
-    monthly_summary = resp.json()              # e.g. [{'month_name':'August','total':5315}, …]
-    if not monthly_summary:
+def _render_months(df):
+    if df.empty:
         st.info("No expense data found.")
         return
 
-    # --- 2. Convert the list→DataFrame --------------------------------------
-    df = pd.DataFrame(monthly_summary)         # columns: month_name, total
-    df = df.sort_values("month_name")          # keeps Jan→Dec order, just in case
+    # --- 2. Jan→Dec order ----------------------------------------------------
+    month_order = {name: i for i, name in enumerate(calendar.month_name)}
+    df = df.sort_values("month_name", key=lambda names: names.map(month_order))
 
     # --- 3. Bar chart --------------------------------------------------------
     st.bar_chart(
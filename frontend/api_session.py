@@ -0,0 +1,20 @@
+import uuid
+
+import requests
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+class TracedSession(requests.Session):
+    """
+    requests.Session that tags every call with a fresh X-Request-ID, so a slow
+    page load can be matched to the backend's spans and slow-query log.  The
+    id the backend used is echoed in the response headers.
+    """
+
+    def request(self, method, url, **kwargs):
+        headers = {REQUEST_ID_HEADER: uuid.uuid4().hex, **(kwargs.pop("headers", None) or {})}
+        return super().request(method, url, headers=headers, **kwargs)
+
+
+session = TracedSession()
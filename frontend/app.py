@@ -1,9 +1,17 @@
+import importlib
+
 import streamlit as st
-from add_update import add_update_tab
-from analytics_by_category import analytics_by_category_tab
-from analytics_by_month import analytics_by_month_tab
-from savings_plan import savings_plan_tab
-from artha_insights import artha_insights_tab
+
+# label -> (module, render function); a module is imported the first time its
+# section is opened, so starting the app does not pay for every tab's imports
+TABS = {
+    "Add/Update": ("add_update", "add_update_tab"),
+    "Analytics by Category": ("analytics_by_category", "analytics_by_category_tab"),
+    "Analytics by Month": ("analytics_by_month", "analytics_by_month_tab"),
+    "Savings Plan": ("savings_plan", "savings_plan_tab"),
+    "Budgets": ("budgets", "budgets_tab"),
+    "Artha Insights": ("artha_insights", "artha_insights_tab"),
+}
 
 st.title("Expense Tracking System")
 # st.markdown(
@@ -50,20 +58,11 @@ st.title("Expense Tracking System")
 #     """,
 #     unsafe_allow_html=True,
 # )
-tab1, tab2, tab3, tab4, tab5 = st.tabs(
-    ["Add/Update", "Analytics by Category", "Analytics by Month", "Savings Plan", "Artha Insights"]
-)
-
-with tab1:
-    add_update_tab()
-with tab2:
-    analytics_by_category_tab()
-with tab3:
-    analytics_by_month_tab()
-with tab4:
-    savings_plan_tab()
-with tab5:
-    artha_insights_tab()
+# st.tabs would run (and import) every tab on each rerun; only the selected one is rendered here
+selected = st.segmented_control("Section", list(TABS), default="Add/Update",
+                                key="section", label_visibility="collapsed") or "Add/Update"
+module_name, render = TABS[selected]
+getattr(importlib.import_module(module_name), render)()
 
 
 
@@ -0,0 +1,28 @@
+from api_session import session
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+def fetch_frame(method, url, **kwargs):
+    """
+    Call the API asking for an Arrow IPC stream and return (response, DataFrame).
+
+    The DataFrame is None when the request failed.  Numeric columns are handed
+    to pandas without a JSON round trip; if the backend answers with JSON
+    (no pyarrow on the server) the rows are loaded the usual way.
+    """
+    headers = {**kwargs.pop("headers", {}), "Accept": ARROW_STREAM}
+    response = session.request(method, url, headers=headers, **kwargs)
+    if response.status_code != 200:
+        return response, None
+
+    if response.headers.get("content-type", "").startswith(ARROW_STREAM):
+        import pyarrow as pa  # deferred with pandas: only analytics pages need them
+        table = pa.ipc.open_stream(response.content).read_all()
+        return response, table.to_pandas(split_blocks=True, self_destruct=True)
+
+    import pandas as pd
+    data = response.json()
+    if isinstance(data, dict):  # {category: {...}} as returned by /analytics
+        return response, pd.DataFrame.from_dict(data, orient="index").rename_axis("category").reset_index()
+    return response, pd.DataFrame(data)
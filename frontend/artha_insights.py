@@ -10,6 +10,7 @@ insights with relevant Sanskrit wisdom from texts like Arthaśāstra and Cāṇa
 
 import streamlit as st
 import requests
+from api_session import session
 from datetime import datetime, timedelta
 import random
 
@@ -191,6 +192,19 @@ def compute_lakshmi_score(breakdown: dict) -> tuple[int, str, str]:
     return score, grade, insight, context
 
 
+def rollup_breakdown(rollup: dict) -> dict:
+    """Turn an /analytics/rollup matrix into the {category: {total, percentage}} shape."""
+    grand_total = sum(rollup["category_totals"])
+    return {
+        category: {
+            "total": total,
+            "percentage": (total / grand_total) * 100 if grand_total else 0,
+        }
+        for category, total in zip(rollup["categories"], rollup["category_totals"])
+        if total > 0
+    }
+
+
 def render_score_gauge(score: int, grade: str):
     """Render a visual gauge for the Lakshmi Score."""
     # Color based on score
@@ -274,11 +288,12 @@ def artha_insights_tab():
         )
 
     if st.button("Generate Insights", type="primary"):
-        # Fetch analytics data
+        # Fetch the month x category rollup: breakdown and trend in one round trip
         try:
-            resp = requests.post(
-                f"{API_URL}/analytics",
-                json={"start_date": str(start_date), "end_date": str(end_date)},
+            resp = session.get(
+                f"{API_URL}/analytics/rollup",
+                params={"start_date": str(start_date), "end_date": str(end_date),
+                        "granularity": "month", "group_by": "category"},
                 timeout=5
             )
         except requests.exceptions.RequestException as e:
@@ -289,7 +304,8 @@ def artha_insights_tab():
             st.error("Could not fetch spending data. Add some expenses first!")
             return
 
-        breakdown = resp.json()
+        rollup = resp.json()
+        breakdown = rollup_breakdown(rollup)
 
         if not breakdown:
             st.warning("No expenses found in this date range.")
@@ -340,6 +356,13 @@ def artha_insights_tab():
             </div>
             """, unsafe_allow_html=True)
 
+        if len(rollup["periods"]) > 1:
+            st.markdown("#### Monthly Spend")
+            st.bar_chart(
+                {"Month": [p[:7] for p in rollup["periods"]], "Total": rollup["period_totals"]},
+                x="Month", y="Total", use_container_width=True
+            )
+
         # Daily wisdom (bonus)
         st.markdown("---")
         st.markdown("#### Today's Wisdom")
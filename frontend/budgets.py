@@ -0,0 +1,74 @@
+import streamlit as st
+import requests
+from api_session import session
+
+API_URL = "http://localhost:8000"
+
+CATEGORIES = ["Rent", "Food", "Shopping", "Entertainment", "Other"]
+
+
+def show_alerts(alerts):
+    """One warning (threshold below 100%) or error (budget exceeded) per alert."""
+    for alert in alerts:
+        message = (f"{alert['category']}: ${alert['total']:.2f} spent this {alert['period']} "
+                   f"(from {alert['period_start']}) is {alert['threshold']:.0%} of the "
+                   f"${alert['budget_amount']:.2f} budget.")
+        if alert["threshold"] >= 1:
+            st.error(message)
+        else:
+            st.warning(message)
+
+
+def budgets_tab():
+    st.header("Budgets")
+
+    # ----- new budget -------------------------------------------------------
+    with st.form(key="budget_form"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            category = st.selectbox("Category", CATEGORIES)
+        with col2:
+            period = st.selectbox("Per", ("month", "week", "year"))
+        with col3:
+            amount = st.number_input("Budget ($)", min_value=1.0, step=50.0, value=500.0)
+        thresholds = st.multiselect("Alert at", [0.5, 0.8, 0.9, 1.0], default=[0.8, 1.0],
+                                    format_func=lambda t: f"{t:.0%}")
+
+        if st.form_submit_button("Add budget"):
+            try:
+                resp = session.post(f"{API_URL}/budgets", timeout=5, json={
+                    "category": category, "period": period, "amount": amount, "thresholds": thresholds,
+                })
+            except requests.exceptions.RequestException as e:
+                st.error(f"Cannot reach API: {e}")
+                return
+            if resp.status_code == 200:
+                st.success(f"Budget added for {category}.")
+            else:
+                st.error(resp.json().get("detail", "Could not add the budget."))
+
+    # ----- current budgets --------------------------------------------------
+    try:
+        budgets = session.get(f"{API_URL}/budgets", timeout=5).json()
+        alerts = session.get(f"{API_URL}/alerts", params={"limit": 20}, timeout=5).json()
+    except requests.exceptions.RequestException as e:
+        st.error(f"Cannot reach API: {e}")
+        return
+
+    if not budgets:
+        st.info("No budgets yet.")
+    for budget in budgets:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            levels = ", ".join(f"{t:.0%}" for t in budget["thresholds"])
+            st.write(f"**{budget['category']}**: ${budget['amount']:.2f} per {budget['period']} (alerts at {levels})")
+        with col2:
+            if st.button("Delete", key=f"delete_budget_{budget['id']}"):
+                session.delete(f"{API_URL}/budgets/{budget['id']}", timeout=5)
+                st.rerun()
+
+    # ----- recent alerts ----------------------------------------------------
+    st.subheader("Recent alerts")
+    if not alerts:
+        st.caption("Nothing over budget.")
+    show_alerts(alerts)
@@ -0,0 +1,103 @@
+import json
+import queue
+import threading
+
+import requests
+from api_session import session
+
+MAX_QUEUED = 1000  # more undrained deltas than this and the held data is declared stale
+
+
+class DeltaListener:
+    """
+    Background reader of the backend's /events/analytics SSE stream.
+
+    Deltas are queued as they arrive; a Streamlit fragment drains them with
+    `drain()` and applies them to the DataFrame it already shows.  Whoever
+    re-reads that DataFrame calls `reset()`, and `stop()` ends the stream when
+    live updates are switched off.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.deltas = queue.Queue(maxsize=MAX_QUEUED)
+        self.last_id = None
+        self.missed = False  # an event id was skipped: the held data is stale
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with session.get(self.url, stream=True, timeout=(5, 30)) as resp:
+                    data = None
+                    for line in resp.iter_lines(decode_unicode=True):
+                        if self._stop.is_set():
+                            return
+                        if line.startswith("data:"):
+                            data = line[len("data:"):].strip()
+                        elif line == "" and data:
+                            self._receive(json.loads(data))
+                            data = None
+            except requests.exceptions.RequestException:
+                self.missed = True  # reconnecting: anything sent meanwhile is lost
+                self._stop.wait(3)
+
+    def _receive(self, message):
+        if self.last_id is not None and message["id"] != self.last_id + 1:
+            self.missed = True
+        self.last_id = message["id"]
+        try:
+            self.deltas.put_nowait(message)
+        except queue.Full:
+            self.missed = True
+
+    def drain(self):
+        messages = []
+        while True:
+            try:
+                messages.append(self.deltas.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def reset(self):
+        """Drop queued deltas and the missed flag: the caller just re-read data that includes them."""
+        self.drain()
+        self.missed = False
+
+
+def stop_listener(state, key):
+    """Stop and forget the listener kept under `key` in Streamlit's session state, if any."""
+    listener = state.pop(key, None)
+    if listener is not None:
+        listener.stop()
+
+
+def apply_deltas(df, messages, key_column, total_column, key_for_date, start_date=None, end_date=None):
+    """
+    Add each message's per-category changes to `df` in place of a re-query.
+
+    `key_for_date(date_str, category)` maps a delta to the row it belongs to
+    (the category itself, or the month name of the date).  Messages outside
+    [start_date, end_date] are ignored.  Returns the updated DataFrame.
+    """
+    import pandas as pd
+
+    totals = dict(zip(df[key_column], df[total_column].astype(float)))
+    for message in messages:
+        day = message["expense_date"]
+        if (start_date and day < str(start_date)) or (end_date and day > str(end_date)):
+            continue
+        for category, change in message["deltas"].items():
+            key = key_for_date(day, category)
+            totals[key] = totals.get(key, 0.0) + change
+
+    totals = {key: total for key, total in totals.items() if round(total, 2) > 0}
+    return pd.DataFrame({key_column: list(totals), total_column: list(totals.values())})
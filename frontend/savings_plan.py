@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+from api_session import session
 from datetime import datetime
 
 API_URL = "http://localhost:8000"
@@ -23,17 +24,20 @@ def savings_plan_tab():
     with col4:
         end_date = st.date_input("… to", value=datetime.today())
 
+    use_forecast = st.checkbox("Plan against projected spend")
+
     # ----- submit -----------------------------------------------------------
     if st.button("Generate Plan"):
         req_payload = {
             "target": target,
             "start_date": str(start_date),
             "end_date": str(end_date),
-            "period": period
+            "period": period,
+            "use_forecast": use_forecast,
         }
 
         try:
-            resp = requests.post(f"{API_URL}/savings_plan", json=req_payload, timeout=5)
+            resp = session.post(f"{API_URL}/savings_plan", json=req_payload, timeout=5)
         except requests.exceptions.RequestException as e:
             st.error(f"Cannot reach API: {e}")
             return
@@ -51,6 +55,8 @@ def savings_plan_tab():
             f"{'s' if plan['num_periods'] != 1 else ''} to reach your "
             f"${target:.2f} goal."
         )
+        if plan.get("projected_spend") is not None:
+            msg += f"\n{plan['category']} is projected at ${plan['projected_spend']:.2f} next month."
 
         st.markdown(
             f"""
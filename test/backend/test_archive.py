@@ -0,0 +1,55 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from backend import archive, db_helper
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path))
+    return tmp_path
+
+
+ROWS_2023 = [
+    {"id": 1, "expense_date": date(2023, 8, 15), "amount": 10.0, "category": "Shopping", "notes": "Bought potatoes"},
+    {"id": 2, "expense_date": date(2023, 8, 15), "amount": 25.5, "category": "Food", "notes": "Samosa chat"},
+    {"id": 3, "expense_date": date(2023, 9, 1), "amount": 1200, "category": "Rent", "notes": "September rent"},
+]
+
+
+def test_write_and_read_year(archive_dir):
+    assert archive.write_year(2023, ROWS_2023) == 3
+    assert archive.archived_years() == [2023]
+
+    expenses = archive.expenses_for_date("2023-08-15")
+    assert len(expenses) == 2
+    assert expenses[0]["amount"] == Decimal("10.00")
+    assert archive.expenses_for_date("2024-08-15") == []
+
+
+def test_summaries_only_cover_the_range(archive_dir):
+    archive.write_year(2023, ROWS_2023)
+
+    summary = {row["category"]: row["total"] for row in archive.summary_by_category("2023-08-01", "2023-08-31")}
+    assert summary == {"Shopping": Decimal("10.00"), "Food": Decimal("25.50")}
+    assert archive.summary_by_category("2099-01-01", "2099-01-21") == []
+    assert archive.summary_by_month() == {8: Decimal("35.50"), 9: Decimal("1200.00")}
+
+
+def test_delete_date_rewrites_the_year(archive_dir):
+    archive.write_year(2023, ROWS_2023)
+    archive.delete_date(date(2023, 8, 15))
+
+    assert archive.expenses_for_date("2023-08-15") == []
+    assert len(archive.expenses_between("2023-01-01", "2023-12-31")) == 1
+
+
+def test_reentering_a_day_without_cold_rows_leaves_the_file_alone(archive_dir, monkeypatch):
+    archive.write_year(2023, ROWS_2023)
+    rewrites = []
+    monkeypatch.setattr(archive, "delete_date", rewrites.append)
+
+    assert db_helper.delete_expense_for_date(date(2023, 8, 16)) == []
+    assert rewrites == []
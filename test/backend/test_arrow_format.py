@@ -0,0 +1,29 @@
+from datetime import date
+from decimal import Decimal
+
+import pyarrow as pa
+
+from backend import arrow_format
+
+
+def test_stream_round_trip_casts_decimals():
+    batches = [
+        [{"id": 1, "expense_date": date(2024, 8, 15), "amount": Decimal("10.00"),
+          "category": "Shopping", "notes": "Bought potatoes"}],
+        [],
+        [{"id": 2, "expense_date": date(2024, 8, 16), "amount": Decimal("2.50"),
+          "category": "Food", "notes": None}],
+    ]
+    body = b"".join(arrow_format._stream(batches, arrow_format.EXPENSE_SCHEMA))
+
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.schema == arrow_format.EXPENSE_SCHEMA
+    assert table.column("amount").to_pylist() == [10.0, 2.5]
+    assert table.column("notes").to_pylist() == ["Bought potatoes", None]
+
+
+def test_empty_stream_still_has_schema():
+    body = b"".join(arrow_format._stream([], arrow_format.MONTHLY_SCHEMA))
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.num_rows == 0
+    assert table.schema.names == ["month_name", "total"]
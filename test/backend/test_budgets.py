@@ -0,0 +1,138 @@
+from datetime import date
+
+import pytest
+
+from backend import db_helper, storage
+from backend.budgets import BudgetMonitor, budget_from_row, budget_monitor
+
+FOOD_MONTH = {"id": 1, "category": "Food", "period": "month", "amount": 100.0, "thresholds": [0.8, 1.0]}
+
+
+def test_thresholds_fire_once_when_crossed_upwards():
+    monitor = BudgetMonitor()
+    loads = []
+
+    def load_total(category, first, last):
+        loads.append((category, first, last))
+        return 50.0  # the database total, already including the first write
+
+    assert monitor.evaluate(date(2024, 8, 10), {"Food": 50.0}, [FOOD_MONTH], load_total) == []
+    assert loads == [("Food", date(2024, 8, 1), date(2024, 8, 31))]
+
+    [alert] = monitor.evaluate(date(2024, 8, 12), {"Food": 35.0}, [FOOD_MONTH], load_total)
+    assert (alert["threshold"], alert["total"], alert["period_start"]) == (0.8, 85.0, date(2024, 8, 1))
+
+    # a re-entered day that lowers spend does not alert, crossing both again does
+    assert monitor.evaluate(date(2024, 8, 12), {"Food": -35.0}, [FOOD_MONTH], load_total) == []
+    alerts = monitor.evaluate(date(2024, 8, 20), {"Food": 60.0}, [FOOD_MONTH], load_total)
+    assert [a["threshold"] for a in alerts] == [0.8, 1.0]
+    assert len(loads) == 1  # every later write used the running total
+
+
+def test_totals_follow_writes_without_budgets():
+    monitor = BudgetMonitor()
+    monitor.evaluate(date(2024, 8, 10), {"Food": 50.0}, [FOOD_MONTH], lambda *_: 50.0)
+
+    # other categories, other workers' writes: totals stay current, nothing is checked
+    monitor.evaluate(date(2024, 8, 11), {"Food": 20.0, "Rent": 900.0}, [], lambda *_: 0.0)
+    monitor.observe(date(2024, 8, 12), {"Food": 5.0})
+
+    [alert] = monitor.evaluate(date(2024, 8, 13), {"Food": 5.0}, [FOOD_MONTH], lambda *_: 0.0)
+    assert alert["total"] == 80.0
+
+
+def test_changes_already_in_a_seed_are_not_counted_twice():
+    monitor = BudgetMonitor()
+    # seeded at generation 7 from a database that already holds another worker's +25
+    monitor.evaluate(date(2024, 8, 10), {"Food": 50.0}, [FOOD_MONTH], lambda *_: 75.0, generation=7)
+    monitor.observe(date(2024, 8, 9), {"Food": 25.0}, generation=6)  # replayed late: skipped
+    monitor.observe(date(2024, 8, 11), {"Food": 4.0}, generation=8)
+
+    [alert] = monitor.evaluate(date(2024, 8, 13), {"Food": 1.0}, [FOOD_MONTH], lambda *_: 0.0, generation=9)
+    assert alert["total"] == 80.0
+
+
+def test_budget_from_row():
+    row = {"id": 3, "category": "Food", "period": "week", "amount": "25.00", "thresholds": "[0.5, 1.0]"}
+    assert budget_from_row(row) == {"id": 3, "category": "Food", "period": "week",
+                                    "amount": 25.0, "thresholds": [0.5, 1.0]}
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from backend import server
+
+    previous = db_helper.engine
+    db_helper.use_engine(storage.MemoryEngine())
+    budget_monitor.clear()
+    with TestClient(server.app) as client:
+        yield client
+    budget_monitor.clear()
+    db_helper.use_engine(previous)
+
+
+def test_budget_validation(client):
+    assert client.post("/budgets", json={"category": "Food", "amount": 0}).status_code == 400
+    assert client.post("/budgets", json={"category": "Food", "amount": 100, "thresholds": [0]}).status_code == 400
+    assert client.post("/budgets", json={"category": "Food", "period": "day", "amount": 100}).status_code == 422
+    assert client.get("/budgets").json() == []
+
+
+def test_limits_must_be_positive(client):
+    assert client.get("/alerts", params={"limit": -1}).status_code == 400
+    assert client.get("/search", params={"q": "samosa", "limit": -1}).status_code == 400
+    assert client.get("/search", params={"q": "samosa", "limit": 1}).status_code == 200
+
+
+def test_alerts_are_returned_stored_and_removed_with_their_budget(client):
+    budget = client.post("/budgets", json={"category": "Food", "amount": 100, "thresholds": [1.0, 0.8, 0.8]}).json()
+    assert budget["thresholds"] == [0.8, 1.0]
+
+    response = client.post("/expenses/2024-08-10", json=[{"amount": 85, "category": "Food", "notes": "Groceries"}])
+    [alert] = response.json()["alerts"]
+    assert (alert["budget_id"], alert["threshold"], alert["total"]) == (budget["id"], 0.8, 85.0)
+
+    # the same day re-entered with more spend crosses the next threshold only
+    response = client.post("/expenses/2024-08-10", json=[{"amount": 120, "category": "Food", "notes": "Groceries"}])
+    assert [a["threshold"] for a in response.json()["alerts"]] == [1.0]
+
+    stored = client.get("/alerts").json()
+    assert [(a["threshold"], a["total"]) for a in stored] == [(1.0, 120.0), (0.8, 85.0)]
+    assert client.get("/alerts", params={"after_id": stored[0]["id"]}).json() == []
+
+    assert client.delete(f"/budgets/{budget['id']}").status_code == 200
+    assert client.delete(f"/budgets/{budget['id']}").status_code == 404
+    assert client.get("/budgets").json() == []
+    assert client.get("/alerts").json() == []
+
+
+def test_concurrent_writes_are_evaluated_one_at_a_time(client, monkeypatch):
+    import threading
+    import time
+
+    from backend import server
+
+    client.post("/budgets", json={"category": "Food", "amount": 100})
+    fetch_budgets = db_helper.fetch_budgets
+
+    def slow_fetch_budgets(categories=None):
+        time.sleep(0.05)  # between the commit and the evaluation: where a second write could slip in
+        return fetch_budgets(categories)
+
+    monkeypatch.setattr(db_helper, "fetch_budgets", slow_fetch_budgets)
+    today = date.today()
+    days = [today.replace(day=1), today.replace(day=2)]
+    responses = []
+    threads = [threading.Thread(target=lambda day=day: responses.append(server.add_or_update_expense(
+        day, [server.Expense(amount=40, category="Food", notes="groceries")]))) for day in days]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    month_start = today.replace(day=1)
+    # 80 spent: the 80% threshold is crossed once, by whichever write came second, 100% never
+    assert [a["threshold"] for r in responses for a in r["alerts"]] == [0.8]
+    assert budget_monitor._totals[("Food", "month", month_start)] == \
+        db_helper.fetch_category_total("Food", month_start, today.replace(day=28)) == 80.0
@@ -0,0 +1,27 @@
+import asyncio
+
+from backend.events import DeltaBroker, expense_deltas
+
+
+def test_expense_deltas():
+    old = [{"category": "Food", "amount": 10}, {"category": "Rent", "amount": 100}]
+    new = [{"category": "Food", "amount": 25}, {"category": "Rent", "amount": 100},
+           {"category": "Other", "amount": 5}]
+
+    assert expense_deltas(old, new) == {"Food": 15.0, "Other": 5.0}
+    assert expense_deltas(old, []) == {"Food": -10.0, "Rent": -100.0}
+
+
+def test_publish_reaches_every_subscriber():
+    broker = DeltaBroker()
+
+    async def scenario():
+        first, second = broker.subscribe(), broker.subscribe()
+        broker.publish("2024-08-01", {"Food": 12.5})
+        broker.publish("2024-08-01", {})  # nothing changed, nothing sent
+        await asyncio.sleep(0)
+        return [first.get_nowait(), second.get_nowait(), first.qsize()]
+
+    a, b, remaining = asyncio.run(scenario())
+    assert a == b == {"id": 1, "expense_date": "2024-08-01", "deltas": {"Food": 12.5}}
+    assert remaining == 0
@@ -0,0 +1,54 @@
+import numpy as np
+
+from backend.forecast import SpendForecaster, fit_forecast
+from backend.stats import ExpenseStats
+
+
+def test_flat_history_forecasts_flat():
+    history = np.full((2, 6), 100.0)
+    predicted, _, weight = fit_forecast(history, 3)
+
+    assert predicted.shape == (2, 3)
+    assert np.allclose(predicted, 100.0)
+    assert np.all(weight == 0)  # under a season of data: smoothing only
+
+
+def test_seasonal_history_follows_last_season():
+    season = np.array([10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 500], dtype=float)
+    history = np.tile(season, 3)[None, :]
+    predicted, _, weight = fit_forecast(history, 12)
+
+    assert weight[0] > 0.99
+    assert round(predicted[0, 11]) == 500
+    assert round(predicted[0, 0]) == 10
+
+
+def test_a_category_is_fitted_from_its_own_first_month():
+    rent = np.linspace(900, 1200, 24)
+    food = np.full(24, np.nan)
+    food[-2:] = 100.0
+    predicted, _, weight = fit_forecast(np.vstack([rent, food]), 3)
+    alone, _, _ = fit_forecast(food[None, -2:], 3)
+
+    assert np.allclose(predicted[1], 100.0) and np.allclose(predicted[1], alone[0])
+    assert weight[1] == 0 and weight[0] > 0  # only Rent has a season of history
+
+
+def test_forecaster_refits_only_changed_categories():
+    stats = ExpenseStats()
+    stats.rebuild([
+        {"expense_date": "2024-07-01", "category": "Food", "amount": 100},
+        {"expense_date": "2024-08-01", "category": "Food", "amount": 100},
+        {"expense_date": "2024-07-01", "category": "Rent", "amount": 1000},
+        {"expense_date": "2024-08-01", "category": "Rent", "amount": 1000},
+    ])
+    forecaster = SpendForecaster(stats)
+
+    first = forecaster.forecast(2)
+    assert first["Food"]["months"] == ["2024-09", "2024-10"]
+    assert first["Rent"]["amounts"] == [1000.0, 1000.0]
+
+    stats.record("2024-08-02", "Food", 50)
+    second = forecaster.forecast(2)
+    assert second["Rent"] is first["Rent"]
+    assert second["Food"]["amounts"][0] > 100
@@ -0,0 +1,30 @@
+import threading
+import time
+
+from backend.lazy_import import deferred
+
+
+def test_concurrent_first_calls_build_once():
+    namespace = {"heavy": None}
+    builds = []
+
+    def build():
+        builds.append(1)
+        time.sleep(0.05)  # a slow import: the other callers must wait, not re-run it
+        return {"heavy": "module"}
+
+    load = deferred(namespace, build)
+    seen = []
+
+    def use():
+        load()
+        seen.append(namespace["heavy"])
+
+    threads = [threading.Thread(target=use) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert builds == [1]
+    assert seen == ["module"] * 4
@@ -0,0 +1,33 @@
+from datetime import date
+
+from backend import rollup
+
+
+def test_periods_between():
+    assert rollup.periods_between("2024-08-14", "2024-08-27", "week") == [
+        date(2024, 8, 12), date(2024, 8, 19), date(2024, 8, 26)]
+    assert rollup.periods_between("2024-11-30", "2025-02-01", "month") == [
+        date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)]
+    assert rollup.periods_between("2023-06-01", "2024-01-01", "year") == [date(2023, 1, 1), date(2024, 1, 1)]
+
+
+def test_count_periods_matches_periods_between():
+    for granularity in rollup.GRANULARITIES:
+        assert rollup.count_periods("2023-12-30", "2025-03-02", granularity) == \
+            len(rollup.periods_between("2023-12-30", "2025-03-02", granularity))
+    assert rollup.count_periods(date.min, date.max, "day") == 3652059
+
+
+def test_pivot_is_dense_and_merges_duplicate_cells():
+    rows = [
+        {"period": date(2024, 8, 1), "category": "Food", "total": 10},
+        {"period": date(2024, 8, 1), "category": "Food", "total": 5},  # e.g. hot + cold
+        {"period": date(2024, 10, 1), "category": "Rent", "total": 1000},
+    ]
+    matrix = rollup.pivot(rows, "2024-08-01", "2024-10-31", "month")
+
+    assert matrix["periods"] == ["2024-08-01", "2024-09-01", "2024-10-01"]
+    assert matrix["categories"] == ["Food", "Rent"]
+    assert matrix["values"] == [[15.0, 0.0], [0.0, 0.0], [0.0, 1000.0]]
+    assert matrix["period_totals"] == [15.0, 0.0, 1000.0]
+    assert matrix["category_totals"] == [15.0, 1000.0]
@@ -0,0 +1,56 @@
+from datetime import date
+
+from backend.search_index import InvertedIndex, tokenize
+
+
+ROWS = [
+    {"id": 1, "expense_date": "2024-08-01", "amount": 40, "category": "Food", "notes": "Ate Tasty Samosa Chat"},
+    {"id": 2, "expense_date": "2024-08-02", "amount": 12, "category": "Other", "notes": "Uber to office"},
+    {"id": 3, "expense_date": "2024-09-10", "amount": 8, "category": "Food", "notes": "samosa, chai"},
+]
+
+
+def build():
+    index = InvertedIndex()
+    for row in ROWS:
+        index.add(row)
+    return index
+
+
+def test_tokenize():
+    assert tokenize("Ate Tasty Samosa-Chat!") == ["ate", "tasty", "samosa", "chat"]
+    assert tokenize(None) == []
+
+
+def test_search_terms_prefix_and_filters():
+    index = build()
+
+    assert [r["id"] for r in index.search("samosa")] == [3, 1]
+    assert [r["id"] for r in index.search("sam chat")] == [1]
+    assert index.search("sam", prefix=False) == []
+    assert [r["id"] for r in index.search("samosa", category="Food", end_date=date(2024, 8, 31))] == [1]
+    assert [r["id"] for r in index.search("samosa", limit=1)] == [3]  # newest first, cut at the limit
+
+
+def test_remove_and_persist(tmp_path):
+    index = build()
+    index.remove(1)
+    assert [r["id"] for r in index.search("samosa")] == [3]
+    assert index.search("tasty") == []
+
+    path = str(tmp_path / "notes.idx")
+    index.save(path)
+    restored = InvertedIndex()
+    assert restored.load(path)
+    assert restored.watermark() == (2, 3)
+    assert [r["id"] for r in restored.search("ub")] == [2]
+
+
+def test_unreadable_file_falls_back_to_a_rebuild(tmp_path):
+    path = tmp_path / "notes.idx"
+    build().save(str(path))
+    saved = path.read_bytes()
+
+    for damaged in (b"garbage", saved[:len(saved) // 2], b""):  # what a crash mid-save leaves
+        path.write_bytes(damaged)
+        assert InvertedIndex().load(str(path)) is False
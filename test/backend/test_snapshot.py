@@ -0,0 +1,122 @@
+import os
+from datetime import date
+
+from backend import rollup, snapshot
+import pytest
+
+from backend.snapshot import FeedReplaced, SharedAnalytics, Snapshot, from_rollup
+
+
+ROWS = [
+    {"period": date(2024, 7, 31), "category": "Food", "total": 5.0},
+    {"period": date(2024, 8, 1), "category": "Food", "total": 12.5},
+    {"period": date(2024, 8, 1), "category": "Rent", "total": 1000.0},
+    {"period": "2024-08-15", "category": "Shopping", "total": 10.0},
+    {"period": date(2025, 1, 2), "category": "Food", "total": 7.25},
+]
+
+
+def test_summary_monthly_and_rollup():
+    snap = from_rollup(ROWS, (5, 5))
+
+    assert snap.summary("2024-08-01", "2024-08-31") == [
+        {"category": "Food", "total": 12.5}, {"category": "Rent", "total": 1000.0},
+        {"category": "Shopping", "total": 10.0}]
+    assert snap.monthly() == [{"month_name": "January", "total": 7.25},
+                              {"month_name": "July", "total": 5.0},
+                              {"month_name": "August", "total": 1022.5}]
+
+    matrix = rollup.pivot(snap.rollup("2024-07-01", "2024-08-31", "week"), date(2024, 7, 1),
+                          date(2024, 8, 31), "week")
+    week = matrix["periods"].index("2024-07-29")  # Monday of 2024-07-31 and 2024-08-01
+    assert matrix["values"][week] == [17.5, 1000.0, 0.0]
+    assert snap.rollup("2024-01-01", "2025-12-31", "year", group_by_category=False) == [
+        {"period": date(2024, 1, 1), "category": "Total", "total": 1027.5},
+        {"period": date(2025, 1, 1), "category": "Total", "total": 7.25}]
+
+
+def test_replace_day_and_file_round_trip(tmp_path):
+    snap = from_rollup(ROWS, (5, 5)).replace_day("2024-08-01", [
+        {"category": "Food", "amount": 3}, {"category": "Travel", "amount": 40}, {"category": "Food", "amount": 2}])
+    path = str(tmp_path / "analytics.snap")
+    snap.write(path)
+
+    mapped = Snapshot.open(path)
+    assert mapped.categories == ["Food", "Rent", "Shopping", "Travel"]
+    assert mapped.summary("2024-08-01", "2024-08-01") == [
+        {"category": "Food", "total": 5.0}, {"category": "Travel", "total": 40.0}]
+    assert list(mapped.rows["day"]) == sorted(mapped.rows["day"])
+
+
+def test_writes_reach_other_workers(tmp_path, monkeypatch):
+    path = str(tmp_path / "analytics.snap")
+    builder, reader = SharedAnalytics(path), SharedAnalytics(path)
+
+    with builder.lock():
+        assert builder.ensure(lambda: ROWS, (5, 5)) is True
+    with reader.lock():
+        assert reader.ensure(lambda: [], (5, 5)) is False  # already built, nothing loaded
+    assert reader.changes() == []
+
+    with monkeypatch.context() as m:
+        m.setattr(os, "getpid", lambda: -1)  # the write comes from another process
+        with builder.lock():
+            builder.record_write(date(2024, 8, 15), [{"id": 4, "category": "Shopping", "amount": 10}],
+                                 [{"id": 9, "category": "Food", "amount": 4.5, "notes": "chai"}])
+
+    assert reader.current().summary("2024-08-15", "2024-08-15") == [{"category": "Food", "total": 4.5}]
+    assert reader.current().header["watermark"] == [5, 9]
+    [change] = reader.changes()
+    assert change["expense_date"] == date(2024, 8, 15)
+    assert change["inserted"] == [{"id": 9, "category": "Food", "amount": 4.5, "notes": "chai"}]
+    assert reader.changes() == []
+
+
+def test_a_rebuild_tells_followers_to_reload(tmp_path):
+    path = str(tmp_path / "analytics.snap")
+    first, other = SharedAnalytics(path), SharedAnalytics(path)
+    with first.lock():
+        first.ensure(lambda: ROWS, (5, 5))
+    with other.lock():
+        other.ensure(lambda: [], (5, 5))
+
+    # the database changed behind the snapshot's back: the next worker rebuilds it
+    with first.lock():
+        assert SharedAnalytics(path).ensure(lambda: ROWS[:2], (2, 2)) is True
+
+    with pytest.raises(FeedReplaced):
+        other.changes()
+    other.skip_feed()
+    assert other.changes() == []
+
+
+def test_a_feed_every_worker_has_read_is_truncated(tmp_path, monkeypatch):
+    path = str(tmp_path / "analytics.snap")
+    monkeypatch.setattr(snapshot, "FEED_COMPACT_BYTES", 1)
+    monkeypatch.setattr(snapshot, "_alive", lambda pid: pid != 3)  # worker 3 has exited
+    workers = {pid: SharedAnalytics(path) for pid in (1, 2, 3)}
+
+    def as_worker(pid, call):
+        with monkeypatch.context() as m:
+            m.setattr(os, "getpid", lambda: pid)
+            with workers[pid].lock():
+                return call(workers[pid])
+
+    as_worker(1, lambda w: w.ensure(lambda: ROWS, (5, 5)))
+    as_worker(2, lambda w: w.ensure(lambda: [], (5, 5)))
+    as_worker(3, lambda w: w.ensure(lambda: [], (5, 5)))
+
+    def write(w, amount):
+        w.record_write(date(2024, 8, 15), [], [{"id": 9, "category": "Food", "amount": amount, "notes": ""}])
+
+    as_worker(1, lambda w: write(w, 4.5))
+    assert as_worker(1, SharedAnalytics.changes) == []  # worker 2 has not read it yet
+    assert os.path.getsize(f"{path}.changes") > 0
+    [change] = as_worker(2, SharedAnalytics.changes)  # the last reader truncates
+    assert change["inserted"][0]["amount"] == 4.5
+    assert os.path.getsize(f"{path}.changes") == 0
+
+    as_worker(2, lambda w: write(w, 6.0))
+    [change] = as_worker(1, SharedAnalytics.changes)  # restarts at the top of the truncated feed
+    assert change["inserted"][0]["amount"] == 6.0
+    assert as_worker(1, SharedAnalytics.changes) == []
@@ -0,0 +1,42 @@
+from backend.stats import ExpenseStats, QuantileSketch
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    sketch = QuantileSketch()
+    for value in range(1, 1001):
+        sketch.add(value)
+
+    assert abs(sketch.quantile(0.5) - 500) / 500 <= 0.02
+    assert abs(sketch.quantile(0.9) - 900) / 900 <= 0.02
+
+
+def test_sketch_remove_and_merge():
+    a, b = QuantileSketch(), QuantileSketch()
+    for value in (10, 20, 30):
+        a.add(value)
+    b.add(1000)
+    a.merge(b)
+    assert a.count == 4
+
+    a.remove(1000)
+    a.remove(30)
+    assert a.count == 2
+    assert a.quantile(1.0) < 21
+
+
+def test_stats_follow_inserts_and_deletes():
+    stats = ExpenseStats(alpha=0.5)
+    stats.rebuild([
+        {"expense_date": "2024-08-01", "category": "Food", "amount": 10},
+        {"expense_date": "2024-08-02", "category": "Food", "amount": 30},
+        {"expense_date": "2024-09-01", "category": "Food", "amount": 60},
+    ])
+
+    assert stats.distribution("Food", "2024-08")["count"] == 2
+    assert stats.trends()["Food"] == {"ewma": 50.0, "latest_month": "2024-09",
+                                      "latest_total": 60.0, "direction": "up"}
+
+    stats.remove("2024-09-01", "Food", 60)
+    assert stats.distribution("Food", "2024-09") is None
+    assert stats.trends()["Food"]["latest_month"] == "2024-08"
+    assert stats.distribution("Food")["mean"] == 20.0
@@ -0,0 +1,70 @@
+from datetime import date
+
+import pytest
+
+from backend import db_helper, storage
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def engine(request, tmp_path):
+    previous = db_helper.engine
+    if request.param == "sqlite":
+        new_engine = storage.SQLiteEngine(str(tmp_path / "expenses.db"))
+    else:
+        new_engine = storage.MemoryEngine()
+    db_helper.use_engine(new_engine)
+    yield new_engine
+    db_helper.use_engine(previous)
+
+
+def seed():
+    db_helper.insert_expense("2024-08-12", 40, "Food", "Ate Tasty Samosa Chat")
+    db_helper.insert_expense("2024-08-14", 10, "Food", "Chai")
+    db_helper.insert_expense("2024-09-01", 1200, "Rent", "September rent")
+
+
+def test_write_and_read_back(engine):
+    seed()
+    expenses = db_helper.fetch_expenses_for_date(date(2024, 8, 12))
+    assert expenses[0]["expense_date"] == date(2024, 8, 12)
+    assert expenses[0]["notes"] == "Ate Tasty Samosa Chat"
+
+    deleted = db_helper.delete_expense_for_date("2024-08-12")
+    assert [row["category"] for row in deleted] == ["Food"]
+    assert db_helper.fetch_expenses_for_date("2024-08-12") == []
+
+
+def test_dialect_specific_aggregates(engine):
+    seed()
+    assert db_helper.fetch_monthly_expense_summary() == [
+        {"month_name": "August", "total": 50}, {"month_name": "September", "total": 1200}]
+
+    weeks = db_helper.fetch_rollup("2024-08-01", "2024-09-30", "week")
+    assert {(str(r["period"]), r["category"], r["total"]) for r in weeks} == {
+        ("2024-08-12", "Food", 50), ("2024-08-26", "Rent", 1200)}
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        storage.create_engine("oracle")
+
+
+def test_archive_totals_take_the_engine_type(engine, tmp_path, monkeypatch):
+    from backend import archive
+
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    archive.write_year(2023, [
+        {"id": 1, "expense_date": date(2023, 3, 5), "amount": 12.5, "category": "Food", "notes": "Samosa"},
+        {"id": 2, "expense_date": date(2023, 4, 1), "amount": 900, "category": "Rent", "notes": "April rent"},
+    ])
+    db_helper.insert_expense("2024-03-09", 20, "Food", "Chai")
+
+    summary = db_helper.fetch_expense_summary("2023-01-01", "2024-12-31")
+    assert sorted((row["category"], row["total"]) for row in summary) == [("Food", 32.5), ("Rent", 900.0)]
+    assert sum(row["total"] for row in summary) == 932.5  # Rent is only in the cold file
+
+    monthly = db_helper.fetch_monthly_expense_summary()
+    assert [(row["month_name"], row["total"]) for row in monthly] == [("March", 32.5), ("April", 900.0)]
+    assert db_helper.fetch_category_total("Rent", date(2023, 1, 1), date(2024, 12, 31)) == 900.0
+    rollup_rows = db_helper.fetch_rollup(date(2023, 1, 1), date(2024, 12, 31), "year")
+    assert {type(row["total"]) for row in summary + monthly + rollup_rows} == {float}
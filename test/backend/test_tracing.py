@@ -0,0 +1,83 @@
+import json
+import logging
+import time
+
+import pytest
+
+from backend import db_helper, slow_query, tracing
+
+
+class _Collector:
+    enabled = True
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    collector = _Collector()
+    monkeypatch.setattr(tracing, "exporter", collector)
+    return collector.spans
+
+
+def test_spans_nest_under_the_request_id(spans):
+    token = tracing._request_id.set("req-1")
+    try:
+        with tracing.span("outer"):
+            db_helper.fetch_expenses_for_date("2024-08-15")
+    finally:
+        tracing._request_id.reset(token)
+
+    by_name = {s.name: s for s in spans}
+    outer, call = by_name["outer"], by_name["db_helper.fetch_expenses_for_date"]
+    assert call.parent_id == outer.span_id
+    assert by_name["db.execute"].parent_id == call.span_id
+    assert {s.trace_id for s in spans} == {tracing._trace_id_for("req-1")}
+    assert all(s.attributes["request.id"] == "req-1" for s in spans)
+
+
+def test_generator_span_covers_the_whole_iteration(spans):
+    batches = list(db_helper.iter_expense_batches("2024-08-01", "2024-08-31"))
+
+    names = [s.name for s in spans]
+    assert batches and names[-1] == "db_helper.iter_expense_batches"
+    assert "db.fetch" in names
+
+
+def test_slow_queries_are_logged_with_explain(monkeypatch, caplog):
+    monkeypatch.setattr(slow_query, "THRESHOLD_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="slow_query"):
+        db_helper.fetch_expenses_for_date("2024-08-15")
+
+    entry = json.loads(caplog.records[-1].getMessage())
+    assert entry["sql"].startswith("SELECT") and entry["params"] == ["2024-08-15"]
+    assert entry["rows"] >= 1
+    assert entry["explain"]
+
+
+def test_explain_runs_on_statements_with_comments(monkeypatch, caplog):
+    monkeypatch.setattr(slow_query, "THRESHOLD_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="slow_query"):
+        db_helper.fetch_monthly_expense_summary()
+
+    entry = json.loads(caplog.records[-1].getMessage())
+    assert "\n" not in entry["sql"] and entry["sql"].endswith("ORDER BY 1; -- Jan → Dec order")
+    assert entry["explain"] and "explain_error" not in entry
+
+
+def test_time_spent_by_the_consumer_of_a_stream_is_not_query_time(monkeypatch, caplog):
+    monkeypatch.setattr(slow_query, "THRESHOLD_MS", 100)
+    with caplog.at_level(logging.WARNING, logger="slow_query"):
+        for _ in db_helper.iter_expense_batches("2024-08-01", "2024-08-31"):
+            time.sleep(0.2)  # a slow client reading the export
+    assert not caplog.records
+
+
+def test_fast_queries_are_not_logged(caplog):
+    with caplog.at_level(logging.WARNING, logger="slow_query"):
+        db_helper.fetch_expenses_for_date("2024-08-15")
+    assert not caplog.records
@@ -0,0 +1,31 @@
+from collections import Counter
+from datetime import date
+
+from backend import storage
+from benchmarks import datagen
+
+
+def test_generation_is_deterministic_and_exact():
+    rows = list(datagen.generate(2000, seed=7, start=date(2022, 1, 1), years=1))
+
+    assert len(rows) == 2000
+    assert rows == list(datagen.generate(2000, seed=7, start=date(2022, 1, 1), years=1))
+    assert rows != list(datagen.generate(2000, seed=8, start=date(2022, 1, 1), years=1))
+    assert all(date(2022, 1, 1) <= r["expense_date"] <= date(2022, 12, 31) for r in rows)
+
+
+def test_skew_and_seasonality():
+    rows = list(datagen.generate(20000, start=date(2022, 1, 1), years=1, skew=1.5))
+    categories = Counter(r["category"] for r in rows)
+    months = Counter(r["expense_date"].month for r in rows)
+
+    assert categories.most_common(1)[0][0] == "Food"
+    assert months[12] > months[2]
+
+
+def test_load_into_engine():
+    engine = storage.MemoryEngine()
+    assert datagen.load(engine, datagen.generate(500), batch_size=128) == 500
+    with engine.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) AS n FROM expenses")
+        assert cursor.fetchone()["n"] == 500
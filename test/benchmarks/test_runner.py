@@ -0,0 +1,33 @@
+from datetime import date
+
+import pytest
+
+from benchmarks import __main__ as runner
+
+
+@pytest.mark.parametrize("db_name", [[], ["--db-name", "expense_manager"]])
+def test_mysql_runs_refuse_the_app_database(db_name, monkeypatch):
+    monkeypatch.delenv("EXPENSE_DB_NAME", raising=False)
+    with pytest.raises(SystemExit, match="scratch database"):
+        runner.main(["run", "--engine", "mysql", *db_name])
+
+
+def test_commit_is_found_from_any_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert runner._commit()
+
+
+def test_sqlite_runs_refuse_the_app_database(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXPENSE_DB_PATH", str(tmp_path / "expense_manager.db"))
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(SystemExit, match="app's database"):
+        runner.main(["run", "--engine", "sqlite", "--db-path", "expense_manager.db"])
+
+
+def test_live_servers_get_read_only_scenarios():
+    from benchmarks import loadtest
+
+    start, end = date(2021, 1, 1), date(2023, 12, 31)
+    read_only = {name for name, *_ in loadtest.scenarios(start, end, writes=False)}
+    writes = [(name, path) for name, _, _, path, _ in loadtest.scenarios(start, end) if name not in read_only]
+    assert writes == [("add_or_update_expense", f"/expenses/{loadtest.WRITE_DAY}")]
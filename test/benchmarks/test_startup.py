@@ -0,0 +1,23 @@
+from benchmarks import startup
+
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2508 |      82532 |     numpy
+import time:       279 |      82811 |   backend.forecast
+some warning printed by the imported module
+"""
+
+
+def test_parse_importtime():
+    assert startup.parse_importtime(IMPORTTIME) == [
+        ("_io", 0.12, 0.12), ("numpy", 2.508, 82.532), ("backend.forecast", 0.279, 82.811)]
+
+
+def test_server_import_stays_lazy():
+    # a fresh interpreter: importing the API must not pull in the heavy optional libraries
+    traced = startup._python(["-X", "importtime", "-c", "import backend.server"])
+    imported = {name for name, _, _ in startup.parse_importtime(traced.stderr)}
+    assert "backend.server" in imported
+    assert not imported & {"pyarrow", "numpy", "tenacity", "mysql.connector"}
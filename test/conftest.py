@@ -1,8 +1,20 @@
 import os
 import sys
 
+import pytest
+
+# run hermetically against the in-memory engine unless a real database is asked for
+os.environ.setdefault("EXPENSE_DB_ENGINE", "memory")
 
 project_root = os.path.join(os.path.dirname(__file__), '..')
 sys.path.insert(0, project_root)
 print(sys.path)
-print("**Project Root**:", project_root)
\ No newline at end of file
+print("**Project Root**:", project_root)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def seed_memory_db():
+    from backend import db_helper
+
+    if db_helper.engine.name == "memory":
+        db_helper.insert_expense("2024-08-15", 10.0, "Shopping", "Bought potatoes")